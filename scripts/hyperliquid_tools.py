@@ -12,11 +12,13 @@ Usage:
     python hyperliquid_tools.py sell BTC 0.01       # Market sell
     python hyperliquid_tools.py limit-buy BTC 0.01 85000   # Limit buy
     python hyperliquid_tools.py limit-sell BTC 0.01 95000  # Limit sell
+    python hyperliquid_tools.py bracket BTC buy 0.01 --sl 80000 --tp 95000  # Entry + SL/TP
     python hyperliquid_tools.py close BTC           # Close position
     python hyperliquid_tools.py swap 20             # Swap USDC → USDH for HIP-3
     python hyperliquid_tools.py orders              # List open orders
     python hyperliquid_tools.py cancel ORDER_ID     # Cancel order
     python hyperliquid_tools.py cancel-all          # Cancel all orders
+    python hyperliquid_tools.py replace BTC buy 0.01 84000 85000  # Re-quote limits
 """
 
 import os
@@ -24,28 +26,54 @@ import sys
 import json
 import time
 import argparse
+import atexit
+import bisect
+import heapq
+import math
+import operator
+import random
+import re
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-from dotenv import load_dotenv
-
-# Load environment variables (HL_ENV_FILE overrides default .env discovery)
-_env_file = os.getenv('HL_ENV_FILE')
-if _env_file:
-    load_dotenv(_env_file, override=True)
-else:
-    load_dotenv()
-
-# Hyperliquid SDK imports
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+# Hyperliquid SDK imports. Only the lightweight constants module is loaded
+# eagerly; Info, Exchange and eth_account are imported inside the setup_*
+# helpers so read-only commands never pay the signing-stack import cost.
 try:
-    from hyperliquid.info import Info
-    from hyperliquid.exchange import Exchange
     from hyperliquid.utils import constants
-    from eth_account import Account
 except ImportError:
     print("Error: hyperliquid-python-sdk not installed.")
     print("Run: pip install hyperliquid-python-sdk")
     sys.exit(1)
 
+# Optional C JSON decoder — noticeably faster on large /info payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """Pretty-print JSON (2-space indent), using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
 # ANSI colors
 class Colors:
     GREEN = '\033[92m'
@@ -59,8 +87,85 @@ class Colors:
     END = '\033[0m'
 
 
+# Plain output when piped (agents, files, tee) or when NO_COLOR is set
+if os.getenv('NO_COLOR') or not sys.stdout.isatty():
+    for _attr in [k for k in vars(Colors) if k.isupper()]:
+        setattr(Colors, _attr, '')
+
+
+# Bulk field extraction for position/order rows (one C-level call per row)
+_POS_FIELDS = operator.itemgetter('coin', 'szi', 'entryPx', 'unrealizedPnl')
+_ORDER_FIELDS = operator.itemgetter('oid', 'coin', 'side', 'sz', 'limitPx')
+_LEVEL_SZ = operator.itemgetter('sz')
+_LEVEL_PX_SZ = operator.itemgetter('px', 'sz')
+
+# Pre-rendered side labels. The *_COL variants are padded to the 6-char
+# Side column used by the position/order/trade tables.
+_LONG = f"{Colors.GREEN}LONG{Colors.END}"
+_SHORT = f"{Colors.RED}SHORT{Colors.END}"
+_LONG_COL = f"{Colors.GREEN}{'LONG':<6}{Colors.END}"
+_SHORT_COL = f"{Colors.RED}{'SHORT':<6}{Colors.END}"
+_BUY_COL = f"{Colors.GREEN}{'BUY':<6}{Colors.END}"
+_SELL_COL = f"{Colors.RED}{'SELL':<6}{Colors.END}"
+
+# Hourly funding rate -> annualized percentage
+_APR_SCALE = 24 * 365 * 100
+
+# Scan funding APR buckets: <= -10% green (shorts pay), > +10% red, else yellow
+_FUND_EDGES = (-10.0, 10.0)
+_FUND_COLORS = (Colors.GREEN, Colors.YELLOW, Colors.RED)
+
+# Polymarket YES-probability buckets: < 30% red, 30-70% yellow, > 70% green
+# (the upper edge sits just above 70 so exactly 70% stays yellow)
+_PROB_EDGES = (30.0, math.nextafter(70.0, math.inf))
+_PROB_COLORS = (Colors.RED, Colors.YELLOW, Colors.GREEN)
+
+# Row templates for the scan/history tables, built once. Scan rows are
+# formatted from the row dict plus fc (funding color) and cc (change color).
+_SCAN_FUNDING_ROW = (
+    "{name:<12} ${price:>10,.2f} {fc}{funding_hr:>11.4f}%" + Colors.END +
+    " {funding_apr:>9.1f}% {cc}{pct_change:>+8.2f}%" + Colors.END +
+    " ${oi:>13,.0f} ${volume:>13,.0f}"
+).format
+_SCAN_VOLUME_ROW = (
+    "{name:<12} ${price:>10,.2f} {fc}{funding_apr:>11.1f}%" + Colors.END +
+    " {cc}{pct_change:>+8.2f}%" + Colors.END + " ${volume:>13,.0f}"
+).format
+_SCAN_HIP3_ROW = (
+    "{name:<14} ${price:>10,.2f} {fc}{funding_hr:>11.4f}%" + Colors.END +
+    " {funding_apr:>9.1f}% {cc}{pct_change:>+8.2f}%" + Colors.END
+).format
+_SCAN_SORTED_ROW = (
+    "{name:<14} ${price:>10,.2f} {fc}{funding_apr:>11.1f}%" + Colors.END +
+    " ${oi_ntl:>12,.0f} ${volume:>12,.0f} {cc}{pct_change:>+8.2f}%" + Colors.END
+).format
+_HISTORY_ROW = "{:<18} {} {:<14} {:>12.4f} ${:>13.4f} ${:>11.2f}".format
+_CHECK_HEAD_ROW = (
+    "  " + Colors.BOLD + "{coin}" + Colors.END + " {side} | {mark} ({pct} from entry) | PnL: {pnl}"
+).format
+_CHECK_BOOK_ROW = (
+    "    Book: {bc}{book}" + Colors.END + " (${bid:,.0f} bid / ${ask:,.0f} ask) | Funding: {funding}"
+).format
+
+
+@lru_cache(maxsize=None)
+def _load_env():
+    """Load .env into os.environ once (HL_ENV_FILE overrides default .env discovery).
+
+    Deferred until a command actually runs, so --help and usage errors skip
+    importing python-dotenv and the file search.
+    """
+    from dotenv import load_dotenv
+    env_file = os.getenv('HL_ENV_FILE')
+    if env_file:
+        load_dotenv(env_file, override=True)
+    else:
+        load_dotenv()
+
+
 def get_config(require_credentials: bool = True):
     """Get Hyperliquid configuration from environment."""
+    _load_env()
     account_address = os.getenv('HL_ACCOUNT_ADDRESS')
     secret_key = os.getenv('HL_SECRET_KEY')
     use_testnet = os.getenv('HL_TESTNET', 'true').lower() == 'true'
@@ -80,88 +185,513 @@ def get_config(require_credentials: bool = True):
         'account_address': account_address or '',
         'secret_key': secret_key or '',
         'api_url': api_url,
+        'info_url': api_url + '/info',
         'base_api_url': base_api_url,
         'is_testnet': use_testnet
     }
 
 
+# Set by main(). False when --no-hip3 / HL_SKIP_HIP3 is given or the command
+# never reads the SDK's HIP-3 asset mappings; setup_* then skip the perpDexs
+# lookup and per-dex meta fetches entirely.
+_hip3_enabled = True
+
+# Known HIP-3 dexes, used when the perpDexs lookup fails
+_HIP3_FALLBACK_DEXES = ('xyz', 'vntl', 'flx', 'hyna', 'km', 'abcd', 'cash')
+
+# On-disk cache for metadata that rarely changes, so separate CLI invocations
+# don't each pay a round-trip for it. Entries are keyed (e.g. by API URL) so
+# mainnet, testnet and proxy results never mix.
+_CACHE_DIR = os.path.expanduser('~/.hyperclaw_cache')
+_DEX_NAMES_TTL = 3600
+
+
+def _disk_cache_get(name: str, ttl: float, key: str = ''):
+    """Return the data cached under name if younger than ttl and stored for key, else None."""
+    try:
+        with open(os.path.join(_CACHE_DIR, name), 'rb') as f:
+            entry = _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get('key') != key:
+        return None
+    if time.time() - entry.get('ts', 0) >= ttl:
+        return None
+    return entry.get('data')
+
+
+def _disk_cache_put(name: str, data, key: str = ''):
+    """Best-effort atomic write of data to the disk cache (errors are ignored)."""
+    path = os.path.join(_CACHE_DIR, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump({'ts': time.time(), 'key': key, 'data': data}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _disk_cached(name: str, ttl: float, fetch: Callable, key: str = ''):
+    """fetch() persisted in the disk cache under name for ttl seconds (None isn't stored)."""
+    data = _disk_cache_get(name, ttl, key)
+    if data is None:
+        data = fetch()
+        if data is not None:
+            _disk_cache_put(name, data, key)
+    return data
+
+
+def get_perp_dexs(api_url: str) -> list:
+    """Raw perpDexs response (None first, for native perps), disk-cached for an hour."""
+    def fetch():
+        # Ask /info directly; a throwaway Info client would also fetch spot_meta
+        resp = _http_session().post(api_url + "/info", json={"type": "perpDexs"}, timeout=10)
+        resp.raise_for_status()
+        return _json_loads(resp.content)
+    return _disk_cached('perp_dexs.json', _DEX_NAMES_TTL, fetch, api_url)
+
+
+@lru_cache(maxsize=None)
 def get_all_dex_names(api_url: str) -> list:
-    """Fetch all available HIP-3 dex names from the API."""
+    """All dex names, '' (native perps) first, derived from the cached perpDexs list."""
     try:
-        # Create a basic Info client to query available dexes
-        basic_info = Info(api_url, skip_ws=True)
-        all_dexes = basic_info.perp_dexs()
-        # Extract dex names, add '' for native perps
-        dex_names = ['']  # Native perps
-        for dex in all_dexes:
-            if dex is not None and dex.get('name'):
-                dex_names.append(dex.get('name'))
-        return dex_names
+        all_dexes = get_perp_dexs(api_url)
     except Exception:
         # Fallback to known dexes if API call fails
-        return ['', 'xyz', 'vntl', 'flx', 'hyna', 'km', 'abcd', 'cash']
+        return ['', *_HIP3_FALLBACK_DEXES]
+    return ['', *(dex['name'] for dex in all_dexes if dex is not None and dex.get('name'))]
+
+
+# Client-side token bucket for /info requests. Bursts such as the per-dex
+# fan-outs pass untouched; sustained loops are paced well under Hyperliquid's
+# 1,200 weight/minute per-IP budget instead of running into 429s.
+_INFO_RATE = 10.0  # requests per second, sustained
+_INFO_BURST = 20
+
+
+class _InfoThrottle:
+    """Thread-safe token bucket; acquire() blocks until a request may go out."""
+
+    def __init__(self, rate: float, burst: int):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._stamp) * self._rate)
+            self._stamp = now
+            # Going negative reserves the next free slot for this caller
+            wait = (1 - self._tokens) / self._rate if self._tokens < 1 else 0.0
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+
+
+class _ThrottledAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token from a shared bucket before each request."""
+
+    def __init__(self, throttle: _InfoThrottle, **kwargs):
+        self._throttle = throttle
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self._throttle.acquire()
+        return super().send(request, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _http_session():
+    """Shared keep-alive session for direct HTTP calls (/info, Grok, Polymarket) and the SDK clients."""
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    # Default for every host, including Grok and /exchange: only retry when the
+    # connection couldn't be made, so nothing that may have reached the server
+    # (a billable completion, a signed order) is ever sent twice.
+    no_resend = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                            max_retries=Retry(total=2, read=0, backoff_factor=0.2))
+    session.mount('http://', no_resend)
+    session.mount('https://', no_resend)
+    # /info reads and Polymarket GETs are idempotent, so back off and retry on
+    # rate limits and transient 5xx, honouring Retry-After. The final response
+    # is returned rather than raised so callers still see the status.
+    read_retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                       allowed_methods=None, raise_on_status=False)
+    info_adapter = _ThrottledAdapter(_InfoThrottle(_INFO_RATE, _INFO_BURST),
+                                     pool_connections=16, pool_maxsize=32, max_retries=read_retry)
+    for base_url in filter(None, (constants.MAINNET_API_URL, constants.TESTNET_API_URL,
+                                  os.getenv('HL_PROXY_URL'))):
+        session.mount(base_url + '/info', info_adapter)
+    session.mount('https://gamma-api.polymarket.com/', HTTPAdapter(max_retries=read_retry))
+    return session
+
+
+# Market-wide snapshots and account state are cached in-process for a short
+# window so commands (and helpers like get_account_summary) that read them
+# more than once only hit the API once. Cleared after trades. Static
+# metadata (universes, dex list, spot tokens) is held for the whole run.
+_INFO_TTL = 1.5
+_USER_STATE_TTL = 2.0
+_META_TTL = 300
+_info_cache: dict = {}
+
+
+def _ttl_cached(key: tuple, fetch: Callable, ttl: float = _INFO_TTL):
+    """Return fetch() memoized in _info_cache for ttl seconds (None results aren't cached)."""
+    now = time.monotonic()
+    hit = _info_cache.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+    value = fetch()
+    if value is not None:
+        _info_cache[key] = (now, value)
+    return value
+
+
+def get_meta(api_url: str, dex: str = '') -> dict:
+    """meta for one perp dex via a direct /info request (memoized and disk-cached)."""
+    def fetch():
+        resp = _http_session().post(api_url + "/info", json={"type": "meta", "dex": dex}, timeout=10)
+        resp.raise_for_status()
+        return _json_loads(resp.content)
+    return _ttl_cached(('meta', api_url, dex),
+                       lambda: _disk_cached(f"meta_{dex or 'native'}.json", _META_TTL, fetch, api_url),
+                       _META_TTL)
+
+
+def get_spot_meta(api_url: str) -> dict:
+    """spotMeta via a direct /info request (memoized for the run)."""
+    def fetch():
+        resp = _http_session().post(api_url + "/info", json={"type": "spotMeta"}, timeout=10)
+        resp.raise_for_status()
+        return _json_loads(resp.content)
+    return _ttl_cached(('spot_meta', api_url), fetch, _META_TTL)
+
+
+class CachedInfo:
+    """Info proxy that memoizes market snapshots, user_state and static metadata."""
+
+    def __init__(self, info):
+        self._info = info
+
+    def __getattr__(self, name):
+        return getattr(self._info, name)
+
+    def all_mids(self, dex: str = ""):
+        return _ttl_cached(('all_mids', dex), lambda: self._info.all_mids(dex))
+
+    def meta_and_asset_ctxs(self):
+        return _ttl_cached(('meta_and_asset_ctxs',), self._info.meta_and_asset_ctxs)
+
+    def user_state(self, address: str, dex: str = ""):
+        return _ttl_cached(('user_state', address, dex),
+                           lambda: self._info.user_state(address, dex), _USER_STATE_TTL)
+
+    # Static metadata is also kept on disk so consecutive commands share it
+    def meta(self, dex: str = ""):
+        return get_meta(self._info.base_url, dex)
+
+    def perp_dexs(self):
+        return _ttl_cached(('perp_dexs',), lambda: get_perp_dexs(self._info.base_url), _META_TTL)
+
+    def spot_meta(self):
+        return get_spot_meta(self._info.base_url)
+
+
+# Funding settles hourly, so the latest rate stays valid for minutes; book
+# snapshots only for a few seconds.
+_FUNDING_TTL = 600
+_BOOK_TTL = 5
+
+
+def get_latest_funding(info_url: str, coin: str) -> Optional[float]:
+    """Latest hourly funding rate for a coin via fundingHistory (cached)."""
+    def fetch():
+        # Only ask for the last few hours; startTime=0 pages from listing time
+        start_ms = int(time.time() * 1000) - 3 * 3600 * 1000
+        resp = _http_session().post(
+            info_url,
+            json={"type": "fundingHistory", "coin": coin, "startTime": start_ms},
+            timeout=10
+        )
+        if resp.status_code != 200:
+            return None
+        data = _json_loads(resp.content)
+        return float(data[-1].get('fundingRate', 0)) if data else None
+    return _ttl_cached(('fundingHistory', info_url, coin), fetch, _FUNDING_TTL)
 
 
+# Predicted rates move slowly within an interval; kept on disk so back-to-back
+# funding --predicted runs share one fetch
+_PREDICTED_TTL = 60
+
+
+def get_predicted_fundings(info_url: str) -> Optional[list]:
+    """predictedFundings response (disk-cached briefly); None on an HTTP error."""
+    def fetch():
+        resp = _http_session().post(info_url, json={"type": "predictedFundings"}, timeout=10)
+        resp.raise_for_status()
+        return _json_loads(resp.content)
+    return _ttl_cached(('predictedFundings', info_url),
+                       lambda: _disk_cached('predicted_fundings.json', _PREDICTED_TTL, fetch, info_url),
+                       _PREDICTED_TTL)
+
+
+_UNIVERSE_TTL = 300
+
+
+def get_hip3_universe(info_url: str, dex: str = 'xyz') -> list:
+    """Sorted asset names listed on a HIP-3 dex (cached; the universe rarely changes)."""
+    def fetch():
+        resp = _http_session().post(info_url, json={"type": "meta", "dex": dex}, timeout=10)
+        resp.raise_for_status()
+        return sorted(a['name'] for a in _json_loads(resp.content).get('universe', []) if a.get('name'))
+    return _ttl_cached(('hip3_universe', info_url, dex), fetch, _UNIVERSE_TTL)
+
+
+def get_l2_book(info_url: str, coin: str) -> Optional[dict]:
+    """Raw l2Book snapshot for a coin via a direct /info request (cached briefly)."""
+    def fetch():
+        resp = _http_session().post(
+            info_url,
+            json={"type": "l2Book", "coin": coin},
+            timeout=10
+        )
+        return _json_loads(resp.content) if resp.status_code == 200 else None
+    return _ttl_cached(('l2Book', info_url, coin), fetch, _BOOK_TTL)
+
+
+def get_dex_asset_ctxs(info_url: str, dex: str) -> Optional[list]:
+    """[meta, asset_ctxs] for one HIP-3 dex via a direct /info request (cached briefly)."""
+    def fetch():
+        resp = _http_session().post(
+            info_url,
+            json={"type": "metaAndAssetCtxs", "dex": dex},
+            timeout=10
+        )
+        return _json_loads(resp.content) if resp.status_code == 200 else None
+    return _ttl_cached(('metaAndAssetCtxs', info_url, dex), fetch)
+
+
+# Clients are memoized per argument set so helpers that call setup_* again
+# within the same process reuse the already-built SDK objects and sessions.
+@lru_cache(maxsize=None)
 def setup_info(skip_ws: bool = True, require_credentials: bool = False, include_hip3: bool = True) -> tuple:
-    """Setup Info client for read-only operations."""
+    """Setup Info client for read-only operations.
+
+    Only builds the HTTP Info client; eth_account and Exchange are never
+    imported here, even when credentials are configured.
+    """
+    from hyperliquid.info import Info
     config = get_config(require_credentials=require_credentials)
-    # Fetch all available HIP-3 dexes dynamically
-    perp_dexs = get_all_dex_names(config['api_url']) if include_hip3 else None
-    info = Info(config['api_url'], skip_ws=skip_ws, perp_dexs=perp_dexs)
-    return info, config
+    api_url = config['api_url']
+    # Hand the SDK the cached metadata; left to itself its constructor
+    # re-fetches spot_meta, perpDexs and every dex's meta on each run
+    raw_info = Info(api_url, skip_ws=skip_ws, meta=get_meta(api_url), spot_meta=get_spot_meta(api_url))
+    if include_hip3 and _hip3_enabled:
+        _set_hip3_metas(raw_info, api_url)
+    # Later SDK reads reuse the same warm connections as direct /info posts
+    raw_info.session = _http_session()
+    return CachedInfo(raw_info), config
+
+
+def _set_hip3_metas(raw_info, api_url: str):
+    """Register every HIP-3 dex's cached meta on an SDK Info, at the asset offsets the SDK uses."""
+    for i, dex in enumerate(get_perp_dexs(api_url)[1:]):
+        raw_info.set_perp_meta(get_meta(api_url, dex['name']), 110000 + i * 10000)
 
 
+@lru_cache(maxsize=1)
+def _wallet_from_key(secret_key: str):
+    from eth_account import Account
+    return Account.from_key(secret_key)
+
+
+@lru_cache(maxsize=None)
 def setup_exchange(skip_ws: bool = True, include_hip3: bool = True) -> tuple:
     """Setup Exchange client for trading operations."""
-    config = get_config()
-    # Create wallet from private key
-    wallet = Account.from_key(config['secret_key'])
-    # Fetch all available HIP-3 dexes dynamically
-    perp_dexs = get_all_dex_names(config['api_url']) if include_hip3 else None
+    from hyperliquid.exchange import Exchange
+    # Info client uses proxy URL for cached reads (shared with setup_info)
+    info, config = setup_info(skip_ws=skip_ws, require_credentials=True, include_hip3=include_hip3)
+    wallet = _wallet_from_key(config['secret_key'])
     # Exchange uses the real API URL (not proxy) so signing uses the correct chain domain.
     # The SDK checks base_url == MAINNET_API_URL to determine mainnet vs testnet signing.
-    exchange = Exchange(wallet, config['base_api_url'], account_address=config['account_address'], perp_dexs=perp_dexs)
-    # Info client uses proxy URL for cached reads
-    info = Info(config['api_url'], skip_ws=skip_ws, perp_dexs=perp_dexs)
+    # Its internal Info would re-fetch spot_meta, perpDexs and every dex's meta;
+    # hand it the cached metadata instead. Its reads (mids, user_state) still
+    # go to the real API.
+    exchange = Exchange(wallet, config['base_api_url'], meta=info.meta(),
+                        spot_meta=info.spot_meta(),
+                        account_address=config['account_address'])
+    if include_hip3 and _hip3_enabled:
+        _set_hip3_metas(exchange.info, config['api_url'])
+    exchange.session = exchange.info.session = _http_session()
     return exchange, info, config
 
 
-def format_price(price: float) -> str:
-    """Format price for display."""
+_FMT_PRICE_LARGE = "${:,.2f}".format
+_FMT_PRICE_MEDIUM = "${:.2f}".format
+_FMT_PRICE_SMALL = "${:.6f}".format
+
+
+def _price_formatter(price: float) -> Callable[[float], str]:
+    """Pick the display formatter for a price's magnitude class."""
     if price >= 1000:
-        return f"${price:,.2f}"
+        return _FMT_PRICE_LARGE
     elif price >= 1:
-        return f"${price:.2f}"
+        return _FMT_PRICE_MEDIUM
     else:
-        return f"${price:.6f}"
+        return _FMT_PRICE_SMALL
+
+
+def _notional_depth(side: list, n: int = 5) -> float:
+    """Dollar depth (sum of px * sz) over the first n levels of one book side."""
+    return sum(float(px) * float(sz) for px, sz in map(_LEVEL_PX_SZ, side[:n]))
 
 
-def format_pnl(pnl: float) -> str:
-    """Format PnL with color."""
+def format_price(price: float) -> str:
+    """Format price for display."""
+    return _price_formatter(price)(price)
+
+
+# Per-coin formatter, bound on first use, for rows drawn from one snapshot
+# (status, positions, check, orders, book) where a coin's prices share a
+# magnitude class. Candles, fills and user-entered prices span history or
+# sit near the $1/$1000 boundaries, so they go through format_price.
+_price_formatter_cache: dict[str, Callable[[float], str]] = {}
+
+
+def format_coin_price(coin: str, price: float) -> str:
+    """Format a price for a specific coin using its cached formatter."""
+    fmt = _price_formatter_cache.get(coin)
+    if fmt is None:
+        fmt = _price_formatter_cache[coin] = _price_formatter(price)
+    return fmt(price)
+
+
+# USD amounts (balances, notionals, costs) always show cents
+_fmt_usd = "${:,.2f}".format
+
+
+def format_pnl(pnl: float, width: int = 0) -> str:
+    """Format PnL with color, right-aligned to width visible columns."""
     if pnl >= 0:
-        return f"{Colors.GREEN}+${pnl:,.2f}{Colors.END}"
+        return f"{Colors.GREEN}{f'+${pnl:,.2f}':>{width}}{Colors.END}"
     else:
-        return f"{Colors.RED}-${abs(pnl):,.2f}{Colors.END}"
+        return f"{Colors.RED}{f'-${abs(pnl):,.2f}':>{width}}{Colors.END}"
+
+
+def _emit(lines: list) -> None:
+    """Write a block of output lines with a single stdout write."""
+    if lines:
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+
+# Accounts traded in this run whose proxy cache still needs clearing
+_dirty_users: set = set()
+
+
+def _flush_proxy_clears():
+    """Send one proxy /cache/clear per account traded in this run.
+
+    Runs at exit, after command output, so multi-order commands (brackets,
+    close-all) clear each account once instead of once per order.
+    """
+    proxy_url = os.getenv('HL_PROXY_URL')
+    while _dirty_users:
+        address = _dirty_users.pop()
+        if not proxy_url:
+            continue
+        try:
+            requests.post(f"{proxy_url}/cache/clear", json={"user": address}, timeout=2)
+        except Exception:
+            pass  # Proxy may be down; not critical
+
+
+atexit.register(_flush_proxy_clears)
 
 
 def _invalidate_proxy_cache(config: dict):
     """Invalidate cached user state on the proxy after a trade.
 
     Trades bypass the proxy (SDK signs against the real API URL), so the proxy
-    doesn't know state changed.  This pokes POST /cache/clear to drop stale
-    entries so the next status/positions call sees fresh data.
+    doesn't know state changed.  The account is queued for a POST /cache/clear
+    at exit (see _flush_proxy_clears) so the next status/positions call sees
+    fresh data. The account's active-dex cache is dropped too, so that call
+    re-probes every HIP-3 dex.
     """
-    proxy_url = os.getenv('HL_PROXY_URL')
-    if not proxy_url:
-        return
+    _info_cache.clear()
     address = config.get('account_address', '')
     if not address:
         return
-    try:
-        import requests
-        requests.post(f"{proxy_url}/cache/clear", json={"user": address}, timeout=2)
-    except Exception:
-        pass  # Proxy may be down; not critical
+    _forget_active_dexes(address)
+    _dirty_users.add(address)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an API error is worth retrying (network failure, 5xx or rate limit)."""
+    from hyperliquid.utils.error import ClientError, ServerError
+    if isinstance(error, (requests.RequestException, ServerError)):
+        return True
+    return isinstance(error, ClientError) and error.status_code == 429
+
+
+def _fetch_perp_state(info, address: str) -> dict:
+    """Fetch native perp user_state, retrying transient failures.
+
+    Up to 3 attempts with jittered backoff, to avoid false $0 reports; a
+    malformed 200 or a 4xx won't get better by asking again.
+    """
+    perp_state = None
+    last_error = None
+    for attempt in range(3):
+        try:
+            result = info.user_state(address)
+        except Exception as e:
+            last_error = str(e)
+            if attempt < 2 and _is_transient(e):
+                time.sleep(0.2 * 2 ** attempt + random.uniform(0, 0.1))
+                continue
+            break
+        if isinstance(result, dict) and 'marginSummary' in result:
+            perp_state = result
+        else:
+            last_error = "Malformed API response (missing marginSummary)"
+        break
+
+    if perp_state is None:
+        raise RuntimeError(f"Failed to fetch account state (attempt {attempt + 1}): {last_error}")
+    return perp_state
+
+
+# Abstraction mode only changes via a rare account action, so the last detected
+# mode is kept on disk for a week. HL_ACCOUNT_MODE skips detection entirely.
+_ACCOUNT_MODES = ('unified', 'portfolio_margin', 'standard')
+_ACCOUNT_MODE_TTL = 7 * 24 * 3600
+
+
+def _account_mode_file(address: str) -> str:
+    return f"mode_{address.lower()}.json"
+
+
+def _abstraction_mode(abstraction) -> str:
+    """Map a userAbstraction response to 'unified', 'portfolio_margin' or 'standard'."""
+    # API may return a plain string or a dict with a 'mode' key
+    if isinstance(abstraction, str):
+        ab_mode = abstraction
+    elif isinstance(abstraction, dict):
+        ab_mode = abstraction.get('mode', '')
+    else:
+        ab_mode = ''
+    if ab_mode in ('unifiedAccount', 'dexAbstraction'):
+        return 'unified'
+    if ab_mode == 'portfolioMargin':
+        return 'portfolio_margin'
+    return 'standard'
 
 
 def get_account_summary(info, address: str) -> dict:
@@ -181,46 +711,29 @@ def get_account_summary(info, address: str) -> dict:
         spot_balances     - list of {coin, total, hold} dicts (may be empty)
         perp_state        - raw user_state dict (for position access)
     """
-    # Always fetch perp state (retry up to 3 times to avoid false $0 reports)
-    perp_state = None
-    last_error = None
-    for attempt in range(3):
-        try:
-            result = info.user_state(address)
-            if isinstance(result, dict) and 'marginSummary' in result:
-                perp_state = result
-                break
-            last_error = "Malformed API response (missing marginSummary)"
-        except Exception as e:
-            last_error = str(e)
-        if attempt < 2:
-            time.sleep(2)
+    mode = os.getenv('HL_ACCOUNT_MODE', '').strip().lower()
+    if mode not in _ACCOUNT_MODES:
+        mode = _disk_cache_get(_account_mode_file(address), _ACCOUNT_MODE_TTL)
 
-    if perp_state is None:
-        raise RuntimeError(f"Failed to fetch account state after 3 attempts: {last_error}")
+    # Abstraction mode and spot balances don't depend on the perp state, so
+    # fetch them alongside it (spot is simply unused for standard accounts)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        abstraction_future = None if mode else pool.submit(info.query_user_abstraction_state, address)
+        spot_future = pool.submit(info.spot_user_state, address)
+        perp_state = _fetch_perp_state(info, address)
 
     margin_summary = perp_state['marginSummary']
     account_value = float(margin_summary.get('accountValue', 0))
     margin_used = float(margin_summary.get('totalMarginUsed', 0))
     withdrawable = float(perp_state.get('withdrawable', 0))
 
-    # Detect abstraction mode
-    mode = 'standard'
-    try:
-        abstraction = info.query_user_abstraction_state(address)
-        # API may return a plain string or a dict with a 'mode' key
-        if isinstance(abstraction, str):
-            ab_mode = abstraction
-        elif isinstance(abstraction, dict):
-            ab_mode = abstraction.get('mode', '')
-        else:
-            ab_mode = ''
-        if ab_mode in ('unifiedAccount', 'dexAbstraction'):
-            mode = 'unified'
-        elif ab_mode == 'portfolioMargin':
-            mode = 'portfolio_margin'
-    except Exception:
-        pass
+    # Detect abstraction mode (unless overridden or cached)
+    if abstraction_future is not None:
+        try:
+            mode = _abstraction_mode(abstraction_future.result())
+            _disk_cache_put(_account_mode_file(address), mode)
+        except Exception:
+            mode = 'standard'
 
     spot_balances = []
     portfolio_value = account_value
@@ -228,7 +741,7 @@ def get_account_summary(info, address: str) -> dict:
     if mode != 'standard':
         # Fetch spot state for the true USDC balance
         try:
-            spot_state = info.spot_user_state(address)
+            spot_state = spot_future.result()
             raw_balances = spot_state.get('balances', [])
             for b in raw_balances:
                 total = float(b.get('total', 0))
@@ -280,52 +793,110 @@ def get_account_summary(info, address: str) -> dict:
 # No delay needed between calls. The proxy cache further reduces upstream hits.
 # Ref: https://hyperliquid.gitbook.io/hyperliquid-docs/for-developers/api/rate-limits-and-user-limits
 
-def _get_all_positions(info, address):
-    """Fetch positions from native perps + all HIP-3 dexes."""
-    positions = []
-    try:
-        state = info.user_state(address)
-        positions.extend(state.get('assetPositions', []))
-    except Exception:
-        pass
-    try:
-        for dex in info.perp_dexs():
-            if dex is None:
-                continue
-            name = dex.get('name', '')
-            if not name:
-                continue
-            try:
-                dex_state = info.user_state(address, dex=name)
-                positions.extend(dex_state.get('assetPositions', []))
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return positions
+def _per_dex(fetch: Callable, dex_names: list) -> list:
+    """Call fetch(dex) for every dex concurrently; results keep dex order (None on error)."""
+    def safe(dex):
+        try:
+            return fetch(dex)
+        except Exception:
+            return None
+    with ThreadPoolExecutor(max_workers=max(1, min(16, len(dex_names)))) as pool:
+        return list(pool.map(safe, dex_names))
 
 
-def _get_all_open_orders(info, address):
-    """Fetch open orders from native perps + all HIP-3 dexes."""
-    orders = []
+def _hip3_dex_names(info) -> list:
+    """Names of all HIP-3 dexes (empty if the lookup fails)."""
     try:
-        orders.extend(info.frontend_open_orders(address))
+        return [d['name'] for d in info.perp_dexs() if d is not None and d.get('name')]
     except Exception:
-        pass
+        return []
+
+
+# Per-account list of HIP-3 dexes that recently held positions or orders.
+# Until it expires, positions/orders lookups only query those dexes (plus
+# native perps) instead of every dex, and say how many they skipped. Any
+# trade from this CLI drops it; HL_FULL_DEX_SCAN=1 forces a re-probe.
+_ACTIVE_DEX_TTL = 3600
+
+
+def _active_dex_file(address: str) -> str:
+    return f"active_dexes_{address.lower()}.json"
+
+
+def _load_active_dexes(address: str) -> Optional[dict]:
+    """Cached {'probed': ts, 'dexes': [...]} for an account, or None if missing/stale."""
+    entry = _disk_cache_get(_active_dex_file(address), _ACTIVE_DEX_TTL)
+    if entry and time.time() - entry.get('probed', 0) < _ACTIVE_DEX_TTL:
+        return entry
+    return None
+
+
+def _forget_active_dexes(address: str):
+    """Drop an account's cached active set so the next lookup probes every dex."""
     try:
-        for dex in info.perp_dexs():
-            if dex is None:
-                continue
-            name = dex.get('name', '')
-            if not name:
-                continue
-            try:
-                orders.extend(info.frontend_open_orders(address, dex=name))
-            except Exception:
-                pass
-    except Exception:
+        os.remove(os.path.join(_CACHE_DIR, _active_dex_file(address)))
+    except OSError:
         pass
-    return orders
+
+
+def _fetch_account_dexes(info, address: str, kind: str, dex_names: Optional[list] = None) -> list:
+    """An account's positions or open orders (kind) across native perps + HIP-3 dexes.
+
+    dex_names is the full dex list ('' for native perps first), normally
+    from get_all_dex_names; without it the list is fetched via perp_dexs().
+    """
+    fetchers = {
+        'positions': lambda dex: info.user_state(address, dex).get('assetPositions', []),
+        'orders': lambda dex: info.frontend_open_orders(address, dex),
+    }
+    full_scan = os.getenv('HL_FULL_DEX_SCAN', '').lower() in ('1', 'true')
+    entry = None if full_scan else _load_active_dexes(address)
+    if entry is not None:
+        queried = ['', *entry['dexes']]
+        results = _per_dex(fetchers[kind], queried)
+        # Positions/orders opened elsewhere on another dex wouldn't show up, so say so
+        skipped = len(set(dex_names or ()) - set(queried))
+        if skipped:
+            print(f"{Colors.DIM}{skipped} dexes skipped (cached scan; HL_FULL_DEX_SCAN=1 to rescan){Colors.END}")
+    else:
+        # Probe every dex for both kinds so the cached set covers positions and orders
+        dex_names = dex_names or ['', *_hip3_dex_names(info)]
+        both = _per_dex(lambda dex: {k: fetch(dex) for k, fetch in fetchers.items()}, dex_names)
+        if len(dex_names) > 1:
+            # A dex that failed to answer is kept, since it may well be active
+            active = [dex for dex, r in zip(dex_names, both)
+                      if dex and (r is None or r['positions'] or r['orders'])]
+            _disk_cache_put(_active_dex_file(address), {'probed': time.time(), 'dexes': active})
+        results = [r[kind] if r else None for r in both]
+    return [item for r in results if r for item in r]
+
+
+def _get_all_positions(info, address, dex_names: Optional[list] = None):
+    """Fetch positions from native perps + all (recently active) HIP-3 dexes."""
+    return _fetch_account_dexes(info, address, 'positions', dex_names)
+
+
+def _get_all_open_orders(info, address, dex_names: Optional[list] = None):
+    """Fetch open orders from native perps + all (recently active) HIP-3 dexes."""
+    return _fetch_account_dexes(info, address, 'orders', dex_names)
+
+
+def _index_assets(universe, coins) -> dict:
+    """Map each requested coin to its index in a meta universe.
+
+    Commands usually ask about a handful of coins, so scan once and stop as
+    soon as every requested name is found rather than indexing the whole
+    (200+ asset) universe. Coins that aren't listed are simply absent.
+    """
+    wanted = set(coins)
+    found = {}
+    for i, asset in enumerate(universe):
+        name = asset['name']
+        if name in wanted:
+            found[name] = i
+            if len(found) == len(wanted):
+                break
+    return found
 
 
 # ============================================================================
@@ -345,11 +916,11 @@ def cmd_status(args):
         summary = get_account_summary(info, config['account_address'])
 
         print(f"\n{Colors.BOLD}Account Summary:{Colors.END} {summary['mode_label']}")
-        print(f"  Portfolio Value: {format_price(summary['portfolio_value'])}")
+        print(f"  Portfolio Value: {_fmt_usd(summary['portfolio_value'])}")
         if summary['mode'] != 'standard':
-            print(f"  Perp Margin:     {format_price(summary['account_value'])}")
-        print(f"  Margin Used:     {format_price(summary['margin_used'])}")
-        print(f"  Withdrawable:    {format_price(summary['withdrawable'])}")
+            print(f"  Perp Margin:     {_fmt_usd(summary['account_value'])}")
+        print(f"  Margin Used:     {_fmt_usd(summary['margin_used'])}")
+        print(f"  Withdrawable:    {_fmt_usd(summary['withdrawable'])}")
 
         # Spot balances for unified/portfolio margin
         if summary['spot_balances']:
@@ -359,36 +930,37 @@ def cmd_status(args):
                 print(f"  {bal['coin']:<8} ${bal['total']:,.2f}{hold_str}")
 
         # Positions (native + all HIP-3 dexes)
-        all_positions = _get_all_positions(info, config['account_address'])
-        open_positions = [p for p in all_positions if float(p['position']['szi']) != 0]
+        all_positions = _get_all_positions(info, config['account_address'], get_all_dex_names(config['api_url']))
 
-        if open_positions:
-            print(f"\n{Colors.BOLD}Open Positions ({len(open_positions)}):{Colors.END}")
+        # Parse numeric fields once; the open-position filter reuses the
+        # converted size instead of calling float() on szi a second time.
+        open_rows = []
+        for pos in all_positions:
+            p = pos['position']
+            coin, szi, entry, pnl = _POS_FIELDS(p)
+            size = float(szi)
+            if size == 0:
+                continue
+            entry_px = float(entry)
+            mark_px = float(p['markPx']) if 'markPx' in p else entry_px  # Fallback to entry
+            open_rows.append((coin, size, entry_px, mark_px, float(pnl)))
+
+        if open_rows:
+            print(f"\n{Colors.BOLD}Open Positions ({len(open_rows)}):{Colors.END}")
             print(f"  {'Asset':<12} {'Side':<6} {'Size':>12} {'Entry':>12} {'Mark':>12} {'PnL':>15}")
-            print("  " + "-" * 70)
+            out = ["  " + "-" * 70]
 
             total_unrealized = 0
-            for pos in open_positions:
-                p = pos['position']
-                coin = p['coin']
-                size = float(p['szi'])
-                entry_px = float(p['entryPx'])
-                unrealized_pnl = float(p['unrealizedPnl'])
-
-                # Get mark price
-                mark_px = entry_px  # Fallback
-                if 'markPx' in p:
-                    mark_px = float(p['markPx'])
-
-                side = "LONG" if size > 0 else "SHORT"
-                side_color = Colors.GREEN if size > 0 else Colors.RED
+            for coin, size, entry_px, mark_px, unrealized_pnl in open_rows:
+                side_col = _LONG_COL if size > 0 else _SHORT_COL
 
                 total_unrealized += unrealized_pnl
 
-                print(f"  {coin:<12} {side_color}{side:<6}{Colors.END} {abs(size):>12.4f} {format_price(entry_px):>12} {format_price(mark_px):>12} {format_pnl(unrealized_pnl):>15}")
+                out.append(f"  {coin:<12} {side_col} {abs(size):>12.4f} {format_coin_price(coin, entry_px):>12} {format_coin_price(coin, mark_px):>12} {format_pnl(unrealized_pnl, 15)}")
 
-            print("  " + "-" * 70)
-            print(f"  {'Total Unrealized PnL:':<52} {format_pnl(total_unrealized):>15}")
+            out.append("  " + "-" * 70)
+            out.append(f"  {'Total Unrealized PnL:':<52} {format_pnl(total_unrealized, 15)}")
+            _emit(out)
         else:
             print(f"\n{Colors.DIM}No open positions{Colors.END}")
 
@@ -404,38 +976,37 @@ def cmd_positions(args):
     print("=" * 60)
 
     try:
-        all_positions = _get_all_positions(info, config['account_address'])
+        all_positions = _get_all_positions(info, config['account_address'], get_all_dex_names(config['api_url']))
         open_positions = [p for p in all_positions if float(p['position']['szi']) != 0]
 
         if not open_positions:
             print(f"\n{Colors.DIM}No open positions{Colors.END}")
             return
 
+        out = []
         for pos in open_positions:
             p = pos['position']
-            coin = p['coin']
-            size = float(p['szi'])
-            entry_px = float(p['entryPx'])
-            unrealized_pnl = float(p['unrealizedPnl'])
+            coin, szi, entry, pnl = _POS_FIELDS(p)
+            size = float(szi)
+            entry_px = float(entry)
+            unrealized_pnl = float(pnl)
             leverage = p.get('leverage', {})
             liq_px = float(p.get('liquidationPx', 0)) if p.get('liquidationPx') else None
 
-            side = "LONG" if size > 0 else "SHORT"
-            side_color = Colors.GREEN if size > 0 else Colors.RED
-
-            print(f"\n{Colors.BOLD}{coin}{Colors.END}")
-            print(f"  Side:           {side_color}{side}{Colors.END}")
-            print(f"  Size:           {abs(size):.4f}")
-            print(f"  Entry Price:    {format_price(entry_px)}")
-            print(f"  Unrealized PnL: {format_pnl(unrealized_pnl)}")
+            out.append(f"\n{Colors.BOLD}{coin}{Colors.END}")
+            out.append(f"  Side:           {_LONG if size > 0 else _SHORT}")
+            out.append(f"  Size:           {abs(size):.4f}")
+            out.append(f"  Entry Price:    {format_coin_price(coin, entry_px)}")
+            out.append(f"  Unrealized PnL: {format_pnl(unrealized_pnl)}")
             if leverage:
                 lev_type = leverage.get('type', 'unknown')
                 lev_val = leverage.get('value', 0)
                 max_lev = _get_max_leverage(info, coin)
                 max_str = f" / max {max_lev}x" if max_lev else ""
-                print(f"  Leverage:       {lev_val}x ({lev_type}{max_str})")
+                out.append(f"  Leverage:       {lev_val}x ({lev_type}{max_str})")
             if liq_px:
-                print(f"  Liquidation:    {format_price(liq_px)}")
+                out.append(f"  Liquidation:    {format_price(liq_px)}")
+        _emit(out)
 
     except Exception as e:
         print(f"{Colors.RED}Error fetching positions: {e}{Colors.END}")
@@ -443,7 +1014,6 @@ def cmd_positions(args):
 
 def cmd_check(args):
     """Position health check - shows book ratio, funding, price change for all open positions."""
-    import requests as req
     info, config = setup_info(require_credentials=False, include_hip3=True)
 
     address = args.address if hasattr(args, 'address') and args.address else config.get('account_address', '')
@@ -456,101 +1026,128 @@ def cmd_check(args):
         print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
     print("=" * 90)
 
+    # Native funding rates don't depend on the account; start that fetch now
+    # so it overlaps the account-state requests below
+    prefetch = ThreadPoolExecutor(max_workers=1)
+    meta_future = prefetch.submit(info.meta_and_asset_ctxs)
+    prefetch.shutdown(wait=False)
+
     try:
         # Get account summary with mode detection
         summary = get_account_summary(info, address)
-        positions = _get_all_positions(info, address)
+        positions = _get_all_positions(info, address, get_all_dex_names(config['api_url']))
         open_positions = [p for p in positions if float(p['position']['szi']) != 0]
 
         if not open_positions:
             print(f"\n{Colors.DIM}No open positions{Colors.END}")
             return
 
-        print(f"\n  Portfolio Value: {format_price(summary['portfolio_value'])} {summary['mode_label']} | Withdrawable: {format_price(summary['withdrawable'])}")
+        print(f"\n  Portfolio Value: {_fmt_usd(summary['portfolio_value'])} {summary['mode_label']} | Withdrawable: {_fmt_usd(summary['withdrawable'])}")
         print()
 
-        # Pre-fetch predicted funding rates in bulk (one call for native, one per HIP-3 dex)
+        coins = [p['position']['coin'] for p in open_positions]
+        held = set(coins)
+
+        # Pre-fetch predicted funding rates in bulk (one call for native, one per
+        # HIP-3 dex); only the held coins' rates are parsed out of each universe.
+        # The same contexts carry each asset's mark price, used by --fast.
         funding_rates = {}  # coin -> predicted funding rate (float)
+        mark_prices = {}  # coin -> markPx string
+
+        def add_rates(dex_meta):
+            for asset, ctx in zip(dex_meta[0]['universe'], dex_meta[1]):
+                if asset['name'] in held:
+                    funding_rates[asset['name']] = float(ctx.get('funding', 0))
+                    if ctx.get('markPx'):
+                        mark_prices[asset['name']] = ctx['markPx']
+
         try:
-            meta = info.meta_and_asset_ctxs()
-            for i, asset in enumerate(meta[0]['universe']):
-                funding_rates[asset['name']] = float(meta[1][i].get('funding', 0))
+            add_rates(meta_future.result())
         except Exception:
             pass
 
-        # For HIP-3 positions, fetch per-dex meta on demand
-        hip3_dexes_fetched = set()
-        hip3_coins = [p['position']['coin'] for p in open_positions if ':' in p['position']['coin']]
-        for coin in hip3_coins:
-            dex = coin.split(':')[0]
-            if dex in hip3_dexes_fetched:
+        # For HIP-3 positions, fetch each held dex's meta concurrently
+        hip3_dexes = list({coin.split(':')[0] for coin in held if ':' in coin})
+        for dex_meta in _per_dex(lambda dex: get_dex_asset_ctxs(config['info_url'], dex), hip3_dexes):
+            if not dex_meta:
                 continue
             try:
-                resp = req.post(
-                    config['api_url'] + "/info",
-                    json={"type": "metaAndAssetCtxs", "dex": dex},
-                    timeout=10
-                )
-                if resp.status_code == 200:
-                    dex_meta = resp.json()
-                    for i, asset in enumerate(dex_meta[0]['universe']):
-                        funding_rates[asset['name']] = float(dex_meta[1][i].get('funding', 0))
-                hip3_dexes_fetched.add(dex)
+                add_rates(dex_meta)
             except Exception:
                 pass
 
+        fast = getattr(args, 'fast', False)
+        books = {}
+        mids = {}
+        if fast:
+            # Marks come from the contexts fetched above; allMids only fills
+            # in coins whose dex meta failed, and no l2Book is requested
+            mids = dict(mark_prices)
+            dexes = sorted({coin.split(':')[0] if ':' in coin else '' for coin in held - mids.keys()})
+            for dex_mids in _per_dex(info.all_mids, dexes):
+                mids.update(dex_mids or {})
+        else:
+            # Fetch every position's book concurrently; the loop below only renders
+            def fetch_book(coin):
+                try:
+                    return get_l2_book(config['info_url'], coin)
+                except Exception:
+                    return None  # One bad coin shouldn't sink the others
+
+            with ThreadPoolExecutor(max_workers=min(16, len(coins))) as pool:
+                books = dict(zip(coins, pool.map(fetch_book, coins)))
+
+        out = []
         for pos in open_positions:
             p = pos['position']
-            coin = p['coin']
-            size = float(p['szi'])
-            entry_px = float(p['entryPx'])
-            unrealized_pnl = float(p['unrealizedPnl'])
+            coin, szi, entry, pnl = _POS_FIELDS(p)
+            size = float(szi)
+            entry_px = float(entry)
+            unrealized_pnl = float(pnl)
             leverage = p.get('leverage', {})
-            liq_px = float(p.get('liquidationPx', 0)) if p.get('liquidationPx') else None
+            liq = p.get('liquidationPx')
+            liq_px = float(liq) if liq else None
 
-            side = "LONG" if size > 0 else "SHORT"
-            side_color = Colors.GREEN if size > 0 else Colors.RED
-            notional = abs(size) * entry_px
+            # Side resolved once; sign flips the long-side formulas for shorts
+            is_long = size > 0
+            sign = 1 if is_long else -1
+            abs_size = size * sign
+            side_label = _LONG if is_long else _SHORT
+            notional = abs_size * entry_px
 
             # Get current price from book
             mark_px = entry_px
             book_ratio_str = "N/A"
+            book_color = Colors.YELLOW
             bid_depth = 0
             ask_depth = 0
             warnings = []
 
+            if coin in mids:
+                mark_px = float(mids[coin])
+
             try:
-                book_resp = req.post(
-                    config['api_url'] + "/info",
-                    json={"type": "l2Book", "coin": coin},
-                    timeout=10
-                )
-                if book_resp.status_code == 200:
-                    book = book_resp.json()
+                book = books.get(coin)
+                if book:
                     levels = book.get('levels', [])
                     if len(levels) >= 2 and levels[0] and levels[1]:
                         best_bid = float(levels[0][0]['px'])
                         best_ask = float(levels[1][0]['px'])
                         mark_px = (best_bid + best_ask) / 2
 
-                        bid_depth = sum(float(b['sz']) * float(b['px']) for b in levels[0][:5])
-                        ask_depth = sum(float(a['sz']) * float(a['px']) for a in levels[1][:5])
+                        bid_depth = _notional_depth(levels[0])
+                        ask_depth = _notional_depth(levels[1])
 
                         if ask_depth > 0 and bid_depth > 0:
-                            ratio = bid_depth / ask_depth
-                            if ratio >= 1:
-                                book_ratio_str = f"{ratio:.1f}:1 bid"
-                                book_color = Colors.GREEN
-                            else:
-                                inv_ratio = ask_depth / bid_depth
-                                book_ratio_str = f"{inv_ratio:.1f}:1 ask"
-                                book_color = Colors.RED
+                            # Heavier side over lighter side: one divide covers both cases
+                            bid_heavy = bid_depth >= ask_depth
+                            ratio = bid_depth / ask_depth if bid_heavy else ask_depth / bid_depth
+                            book_ratio_str = f"{ratio:.1f}:1 {'bid' if bid_heavy else 'ask'}"
+                            book_color = Colors.GREEN if bid_heavy else Colors.RED
 
                             # Warn if book is against position
-                            if side == "LONG" and ask_depth / bid_depth > 2.0:
-                                warnings.append("Book ask-heavy vs LONG")
-                            elif side == "SHORT" and bid_depth / ask_depth > 2.0:
-                                warnings.append("Book bid-heavy vs SHORT")
+                            if ratio > 2.0 and bid_heavy != is_long:
+                                warnings.append("Book bid-heavy vs SHORT" if bid_heavy else "Book ask-heavy vs LONG")
                         else:
                             book_color = Colors.YELLOW
                             book_ratio_str = "thin"
@@ -562,10 +1159,10 @@ def cmd_check(args):
             funding_apr = 0
             funding = funding_rates.get(coin)
             if funding is not None:
-                funding_apr = funding * 24 * 365 * 100
+                funding_apr = funding * _APR_SCALE
 
                 # Determine if we're collecting or paying
-                if side == "LONG":
+                if is_long:
                     collecting = funding < 0  # shorts pay longs
                 else:
                     collecting = funding > 0  # longs pay shorts
@@ -579,10 +1176,7 @@ def cmd_check(args):
 
             # Price change from entry
             if entry_px > 0:
-                if side == "LONG":
-                    pct_change = ((mark_px - entry_px) / entry_px) * 100
-                else:
-                    pct_change = ((entry_px - mark_px) / entry_px) * 100
+                pct_change = sign * (mark_px - entry_px) / entry_px * 100
                 pct_color = Colors.GREEN if pct_change >= 0 else Colors.RED
                 pct_str = f"{pct_color}{pct_change:+.1f}%{Colors.END}"
             else:
@@ -590,27 +1184,29 @@ def cmd_check(args):
 
             # Liquidation proximity warning
             if liq_px and liq_px > 0:
-                if side == "LONG":
-                    liq_dist = ((mark_px - liq_px) / mark_px) * 100
-                else:
-                    liq_dist = ((liq_px - mark_px) / mark_px) * 100
+                liq_dist = sign * (mark_px - liq_px) / mark_px * 100
                 if liq_dist < 10:
                     warnings.append(f"Liq {liq_dist:.1f}% away @ {format_price(liq_px)}")
 
-            # Print position line
-            print(f"  {Colors.BOLD}{coin}{Colors.END} {side_color}{side}{Colors.END} | {format_price(mark_px)} ({pct_str} from entry) | PnL: {format_pnl(unrealized_pnl)}")
-            print(f"    Book: {book_color}{book_ratio_str}{Colors.END} (${bid_depth:,.0f} bid / ${ask_depth:,.0f} ask) | Funding: {funding_str}")
+            # Position block
+            out.append(_CHECK_HEAD_ROW(coin=coin, side=side_label, mark=format_coin_price(coin, mark_px),
+                                       pct=pct_str, pnl=format_pnl(unrealized_pnl)))
+            if fast:
+                out.append(f"    Funding: {funding_str}")
+            else:
+                out.append(_CHECK_BOOK_ROW(bc=book_color, book=book_ratio_str, bid=bid_depth,
+                                           ask=ask_depth, funding=funding_str))
 
             if leverage:
                 lev_type = leverage.get('type', 'unknown')
                 lev_val = leverage.get('value', 0)
-                print(f"    Leverage: {lev_val}x {lev_type} | Notional: {format_price(notional)} | Size: {abs(size):.4f}")
+                out.append(f"    Leverage: {lev_val}x {lev_type} | Notional: {_fmt_usd(notional)} | Size: {abs_size:.4f}")
 
-            if warnings:
-                for w in warnings:
-                    print(f"    {Colors.YELLOW}⚠ {w}{Colors.END}")
+            for w in warnings:
+                out.append(f"    {Colors.YELLOW}⚠ {w}{Colors.END}")
 
-            print()
+            out.append('')
+        _emit(out)
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -643,7 +1239,7 @@ def cmd_price(args):
         for coin in coins:
             price = get_price(coin)
             if price:
-                print(f"  {coin:<20} {format_price(float(price))}")
+                print(f"  {coin:<20} {format_coin_price(coin, float(price))}")
             else:
                 print(f"  {coin:<20} {Colors.DIM}Not found{Colors.END}")
 
@@ -653,18 +1249,11 @@ def cmd_price(args):
 
 def _cmd_funding_predicted(config, coins):
     """Show predicted funding rates with cross-exchange comparison."""
-    import requests
-
     try:
-        resp = requests.post(
-            config['api_url'] + "/info",
-            json={"type": "predictedFundings"},
-            timeout=10
-        )
-        if resp.status_code != 200:
-            print(f"{Colors.RED}Error fetching predicted funding rates (HTTP {resp.status_code}){Colors.END}")
-            return
-        data = resp.json()
+        data = get_predicted_fundings(config['info_url'])
+    except requests.HTTPError as e:
+        print(f"{Colors.RED}Error fetching predicted funding rates (HTTP {e.response.status_code}){Colors.END}")
+        return
     except Exception as e:
         print(f"{Colors.RED}Error fetching predicted funding rates: {e}{Colors.END}")
         return
@@ -704,7 +1293,7 @@ def _cmd_funding_predicted(config, coins):
         for venue in ['HL', 'Bin', 'Bybit']:
             if venue in venues:
                 v = venues[venue]
-                apr = v['rate'] / v['interval'] * 24 * 365 * 100
+                apr = v['rate'] / v['interval'] * _APR_SCALE
                 cols.append(f"{apr:>9.1f}%")
             else:
                 cols.append(f"{'—':>10}")
@@ -724,6 +1313,19 @@ def _cmd_funding_predicted(config, coins):
         print(f"  {coin:<12} {cols[0]} {cols[1]} {cols[2]}  {next_str:>8}")
 
 
+def _hip3_funding_index(info_url: str, dexes: tuple) -> dict:
+    """{bare coin: [(dex:coin, funding rate), ...]} over the given HIP-3 dexes, in dex order."""
+    index = {}
+    for dex_meta in _per_dex(lambda dex: get_dex_asset_ctxs(info_url, dex), dexes):
+        if not dex_meta:
+            continue
+        for asset, ctx in zip(dex_meta[0]['universe'], dex_meta[1]):
+            name = asset.get('name', '')
+            if name:
+                index.setdefault(name.split(':')[-1], []).append((name, float(ctx.get('funding', 0))))
+    return index
+
+
 def cmd_funding(args):
     """Get funding rates for assets."""
     info, config = setup_info()
@@ -738,20 +1340,21 @@ def cmd_funding(args):
         universe = meta[0]['universe']
         asset_ctxs = meta[1]
 
-        # Build name to index map
-        name_to_idx = {asset['name']: i for i, asset in enumerate(universe)}
+        # Map requested coins to their universe index
+        name_to_idx = _index_assets(universe, coins)
 
         print(f"\n{Colors.BOLD}Funding Rates:{Colors.END}")
         print(f"  {'Asset':<12} {'Hourly':>12} {'APR':>12} {'Signal':<20}")
         print("  " + "-" * 55)
 
+        hip3_indexes = {}  # dex tuple -> _hip3_funding_index, built on first miss
         for coin in coins:
             if coin in name_to_idx:
                 idx = name_to_idx[coin]
                 ctx = asset_ctxs[idx]
                 funding = float(ctx.get('funding', 0))
                 funding_pct = funding * 100
-                apr = funding * 24 * 365 * 100
+                apr = funding * _APR_SCALE
 
                 # Signal interpretation
                 if funding < -0.0001:
@@ -763,44 +1366,23 @@ def cmd_funding(args):
 
                 print(f"  {coin:<12} {funding_pct:>11.4f}% {apr:>11.1f}% {signal}")
             else:
-                # Try HIP-3 perps - fetch dex list dynamically from API
-                try:
-                    all_dexes = info.perp_dexs()
-                    hip3_dexes = [d.get('name') for d in all_dexes if d is not None and d.get('name')]
-                except:
-                    # Fallback to known dexes
-                    hip3_dexes = ['xyz', 'vntl', 'flx', 'hyna', 'km', 'abcd', 'cash']
-                found = False
-
-                # Check if coin already has a dex prefix
+                # Try HIP-3 perps: a prefixed coin only needs its own dex,
+                # a bare one is looked up across every dex (first in dex order wins)
                 if ':' in coin:
-                    coins_to_try = [coin]
+                    dexes = (coin.split(':')[0],)
+                else:
+                    dexes = tuple(_hip3_dex_names(info) or _HIP3_FALLBACK_DEXES)
+                if dexes not in hip3_indexes:
+                    hip3_indexes[dexes] = _hip3_funding_index(config['info_url'], dexes)
+                matches = hip3_indexes[dexes].get(coin.split(':')[-1])
+
+                if matches:
+                    try_coin, funding = matches[0]
+                    funding_pct = funding * 100
+                    apr = funding * _APR_SCALE
+                    signal = f"{Colors.GREEN}Shorts paying{Colors.END}" if funding < 0 else f"{Colors.YELLOW}Longs paying{Colors.END}"
+                    print(f"  {try_coin:<16} {funding_pct:>11.4f}% {apr:>11.1f}% {signal}")
                 else:
-                    coins_to_try = [f"{dex}:{coin}" for dex in hip3_dexes]
-
-                import requests
-                for try_coin in coins_to_try:
-                    try:
-                        resp = requests.post(
-                            config['api_url'] + "/info",
-                            json={"type": "fundingHistory", "coin": try_coin, "startTime": 0},
-                            timeout=10
-                        )
-                        if resp.status_code == 200:
-                            data = resp.json()
-                            if data:
-                                latest = data[-1]
-                                funding = float(latest.get('fundingRate', 0))
-                                funding_pct = funding * 100
-                                apr = funding * 24 * 365 * 100
-                                signal = f"{Colors.GREEN}Shorts paying{Colors.END}" if funding < 0 else f"{Colors.YELLOW}Longs paying{Colors.END}"
-                                print(f"  {try_coin:<16} {funding_pct:>11.4f}% {apr:>11.1f}% {signal}")
-                                found = True
-                                break
-                    except:
-                        pass
-
-                if not found:
                     print(f"  {coin:<12} {Colors.DIM}Not found{Colors.END}")
 
     except Exception as e:
@@ -815,39 +1397,56 @@ def cmd_book(args):
     try:
         book = info.l2_snapshot(coin)
 
-        print(f"\n{Colors.BOLD}{coin} Order Book:{Colors.END}")
-        print(f"  {'Bids':<30} {'Asks':<30}")
-        print("  " + "-" * 60)
+        out = [
+            f"\n{Colors.BOLD}{coin} Order Book:{Colors.END}",
+            f"  {'Bids':<30} {'Asks':<30}",
+            "  " + "-" * 60,
+        ]
 
         bids = book.get('levels', [[]])[0][:5]
         asks = book.get('levels', [[], []])[1][:5]
 
         for i in range(max(len(bids), len(asks))):
-            bid_str = ""
-            ask_str = ""
+            # Pad the visible text before coloring so columns line up with or
+            # without escape codes
+            bid_text = ask_text = ""
             if i < len(bids):
-                bid_str = f"{Colors.GREEN}{format_price(float(bids[i]['px']))} x {bids[i]['sz']}{Colors.END}"
+                bid_text = f"{format_coin_price(coin, float(bids[i]['px']))} x {bids[i]['sz']}"
             if i < len(asks):
-                ask_str = f"{Colors.RED}{format_price(float(asks[i]['px']))} x {asks[i]['sz']}{Colors.END}"
-            print(f"  {bid_str:<40} {ask_str:<40}")
+                ask_text = f"{format_coin_price(coin, float(asks[i]['px']))} x {asks[i]['sz']}"
+            bid_str = f"{Colors.GREEN}{bid_text:<30}{Colors.END}"
+            ask_str = f"{Colors.RED}{ask_text}{Colors.END}"
+            out.append(f"  {bid_str} {ask_str}")
 
         # Mid price
         if bids and asks:
             mid = (float(bids[0]['px']) + float(asks[0]['px'])) / 2
             spread = float(asks[0]['px']) - float(bids[0]['px'])
             spread_pct = (spread / mid) * 100
-            print(f"\n  Mid: {format_price(mid)} | Spread: {format_price(spread)} ({spread_pct:.3f}%)")
+            out.append(f"\n  Mid: {format_coin_price(coin, mid)} | Spread: {format_price(spread)} ({spread_pct:.3f}%)")
+        _emit(out)
 
     except Exception as e:
         print(f"{Colors.RED}Error fetching order book: {e}{Colors.END}")
 
 
+def _order_details(order: dict) -> str:
+    """Comma-separated trigger / TP-SL / reduce-only / TIF notes for an open-order row."""
+    tif = order.get('tif')
+    return ", ".join(filter(None, (
+        order.get('isTrigger') and f"trigger@{order.get('triggerPx', '')} {order.get('triggerCondition', '')}",
+        order.get('isPositionTpsl') and "TP/SL",
+        order.get('reduceOnly') and "reduce-only",
+        tif != 'Gtc' and tif,
+    )))
+
+
 def cmd_orders(args):
     """List open orders with trigger/TP/SL details."""
     info, config = setup_info(require_credentials=True, include_hip3=True)
 
     try:
-        open_orders = _get_all_open_orders(info, config['account_address'])
+        open_orders = _get_all_open_orders(info, config['account_address'], get_all_dex_names(config['api_url']))
 
         print(f"\n{Colors.BOLD}Open Orders:{Colors.END}")
 
@@ -855,34 +1454,18 @@ def cmd_orders(args):
             print(f"  {Colors.DIM}No open orders{Colors.END}")
             return
 
-        print(f"  {'OID':<12} {'Asset':<12} {'Side':<6} {'Size':>12} {'Price':>12} {'Type':<12} {'Details'}")
-        print("  " + "-" * 85)
+        out = [
+            f"  {'OID':<12} {'Asset':<12} {'Side':<6} {'Size':>12} {'Price':>12} {'Type':<12} {'Details'}",
+            "  " + "-" * 85,
+        ]
 
         for order in open_orders:
-            oid = order.get('oid', 'N/A')
-            coin = order.get('coin', 'N/A')
-            side = "BUY" if order.get('side') == 'B' else "SELL"
-            side_color = Colors.GREEN if side == "BUY" else Colors.RED
-            sz = order.get('sz', '0')
-            px = float(order.get('limitPx', 0))
+            oid, coin, side, sz, limit_px = _ORDER_FIELDS(order)
+            side_col = _BUY_COL if side == 'B' else _SELL_COL
+            px = float(limit_px)
             order_type = order.get('orderType', 'limit')
-
-            # Build details string from extra fields
-            details = []
-            if order.get('isTrigger'):
-                trigger_px = order.get('triggerPx', '')
-                trigger_cond = order.get('triggerCondition', '')
-                details.append(f"trigger@{trigger_px} {trigger_cond}")
-            if order.get('isPositionTpsl'):
-                details.append("TP/SL")
-            if order.get('reduceOnly'):
-                details.append("reduce-only")
-            tif = order.get('tif', '')
-            if tif and tif != 'Gtc':
-                details.append(tif)
-            detail_str = ", ".join(details) if details else ""
-
-            print(f"  {oid:<12} {coin:<12} {side_color}{side:<6}{Colors.END} {sz:>12} {format_price(px):>12} {order_type:<12} {detail_str}")
+            out.append(f"  {oid:<12} {coin:<12} {side_col} {sz:>12} {format_coin_price(coin, px):>12} {order_type:<12} {_order_details(order)}")
+        _emit(out)
 
     except Exception as e:
         print(f"{Colors.RED}Error fetching orders: {e}{Colors.END}")
@@ -908,24 +1491,35 @@ def _set_leverage(exchange, coin, leverage, is_cross=True):
     return True
 
 
+@lru_cache(maxsize=8)
+def _meta_assets(info, dex: str = '') -> dict:
+    """{asset_name: universe entry} for one perp dex, memoized per (info, dex)."""
+    meta = info.meta(dex=dex)
+    return {asset['name']: asset for asset in meta.get('universe', [])}
+
+
+def _ioc_price(info, coin: str, is_buy: bool, slippage: float = 0.01) -> float:
+    """Aggressive IOC limit price for a perp: the mid moved by slippage, on a valid tick.
+
+    Perp prices allow at most 5 significant figures and 6 - szDecimals decimals.
+    """
+    dex = coin.split(':')[0] if ':' in coin else ''
+    mid = info.all_mids(dex).get(coin)
+    if mid is None:
+        raise ValueError(f"no mid price for {coin}")
+    px = float(mid) * (1 + slippage if is_buy else 1 - slippage)
+    return round(float(f"{px:.5g}"), 6 - _meta_assets(info, dex)[coin]['szDecimals'])
+
+
 def _get_max_leverage(info, coin):
     """Get max leverage for an asset from metadata."""
+    # HIP-3 names (xyz:TSLA) only live in their own dex's meta
+    dex = coin.split(':')[0] if ':' in coin else ''
     try:
-        # Check native perps
-        meta = info.meta()
-        for asset in meta.get('universe', []):
-            if asset['name'] == coin:
-                return asset.get('maxLeverage')
-        # Check HIP-3 dexes
-        if ':' in coin:
-            dex = coin.split(':')[0]
-            meta = info.meta(dex=dex)
-            for asset in meta.get('universe', []):
-                if asset['name'] == coin:
-                    return asset.get('maxLeverage')
+        asset = _meta_assets(info, dex).get(coin)
     except Exception:
-        pass
-    return None
+        return None
+    return asset.get('maxLeverage') if asset else None
 
 
 def cmd_leverage(args):
@@ -968,15 +1562,12 @@ def cmd_transfer(args):
 
     if token_name:
         # User specified the token directly
-        for idx, (name, pair, _slippage) in _COLLATERAL_SPOT_PAIRS.items():
-            if name.upper() == token_name.upper():
-                spot_pair = pair
-                token_name = name
-                break
-        if not spot_pair:
+        entry = _COLLATERAL_BY_NAME.get(token_name.upper())
+        if not entry:
             print(f"{Colors.RED}Unknown collateral token: {token_name}")
             print(f"Known tokens: {', '.join(name for name, _p, _s in _COLLATERAL_SPOT_PAIRS.values())}{Colors.END}")
             return
+        _idx, token_name, spot_pair, _slippage = entry
     else:
         # Default to USDH (most common: km, flx, vntl)
         token_name = 'USDH'
@@ -988,16 +1579,21 @@ def cmd_transfer(args):
     else:
         print(f"\n{Colors.BOLD}Swap: {amount:.2f} USDC → {token_name}{Colors.END}")
 
+    def swap_balances() -> dict:
+        """{coin: (total, hold)} for USDC and the collateral token."""
+        spot_state = info.spot_user_state(config['account_address'])
+        return {b.get('coin', ''): (float(b.get('total', 0)), float(b.get('hold', 0)))
+                for b in spot_state.get('balances', []) if b.get('coin') in ('USDC', token_name)}
+
+    def print_balances(balances: dict, indent: str):
+        for coin, (total, hold) in balances.items():
+            hold_str = f" (hold: {hold:.2f})" if hold > 0.01 else ""
+            print(f"{indent}{coin:<8} {total:.2f}{hold_str}")
+
     try:
         # Show current balances
-        spot_state = info.spot_user_state(config['account_address'])
-        for b in spot_state.get('balances', []):
-            coin = b.get('coin', '')
-            if coin in ('USDC', token_name):
-                total = float(b.get('total', 0))
-                hold = float(b.get('hold', 0))
-                hold_str = f" (hold: {hold:.2f})" if hold > 0.01 else ""
-                print(f"  {coin:<8} {total:.2f}{hold_str}")
+        before = swap_balances()
+        print_balances(before, "  ")
 
         # Execute spot swap (IOC = fill at best available price, limit just sets ceiling/floor)
         # Slippage is per-token: tight for liquid strict-list tokens, wider for thin books.
@@ -1007,6 +1603,8 @@ def cmd_transfer(args):
         else:
             result = exchange.order(spot_pair, True, float(amount), 1.0 + slippage, {'limit': {'tif': 'Ioc'}})
 
+        filled_sz = 0.0  # collateral tokens traded
+        filled_usdc = 0.0  # USDC paid (buy) or received (sell)
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
             statuses = result.get('response', {}).get('data', {}).get('statuses', [])
@@ -1014,21 +1612,28 @@ def cmd_transfer(args):
                 if 'filled' in status:
                     filled = status['filled']
                     print(f"\n{Colors.GREEN}Swapped {filled.get('totalSz')} {token_name} @ {filled.get('avgPx')}{Colors.END}")
+                    filled_sz += float(filled.get('totalSz', 0))
+                    filled_usdc += float(filled.get('totalSz', 0)) * float(filled.get('avgPx', 0))
                 elif 'error' in status:
                     print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
         else:
             print(f"\n{Colors.RED}Swap failed: {result}{Colors.END}")
 
-        # Show updated balances
-        spot_state = info.spot_user_state(config['account_address'])
-        print(f"\n  After:")
-        for b in spot_state.get('balances', []):
-            coin = b.get('coin', '')
-            if coin in ('USDC', token_name):
-                total = float(b.get('total', 0))
-                hold = float(b.get('hold', 0))
-                hold_str = f" (hold: {hold:.2f})" if hold > 0.01 else ""
-                print(f"    {coin:<8} {total:.2f}{hold_str}")
+        # Show updated balances: re-read them with --verify, otherwise apply
+        # the fill to the balances read before the swap
+        if args.verify:
+            print("\n  After:")
+            print_balances(swap_balances(), "    ")
+        elif filled_sz:
+            sign = -1 if is_sell else 1
+            deltas = {'USDC': -sign * filled_usdc, token_name: sign * filled_sz}
+            after = {}
+            for coin in ('USDC', token_name):
+                total, hold = before.get(coin, (0.0, 0.0))
+                after[coin] = (total + deltas[coin], hold)
+            # The order response carries no fee, so these are gross of it
+            print("\n  After (from fill, gross of fees; --verify for exact):")
+            print_balances(after, "    ")
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -1045,6 +1650,9 @@ _COLLATERAL_SPOT_PAIRS = {
     268: ('USDT0', '@166', 0.002),   # cash — strict list, tight spreads
     239: ('USDXL', '@152', 0.02),    # Last USD — not on strict list, wider spreads
 }
+# Case-insensitive token name -> (token_index, name, spot_pair, slippage)
+_COLLATERAL_BY_NAME = {name.upper(): (idx, name, pair, slippage)
+                       for idx, (name, pair, slippage) in _COLLATERAL_SPOT_PAIRS.items()}
 
 
 def _get_dex_collateral(info, dex_name):
@@ -1067,11 +1675,18 @@ def _get_dex_collateral(info, dex_name):
 
 def _get_swap_slippage(token_name):
     """Get the IOC slippage limit for a collateral token swap."""
-    for _idx, (name, _pair, slippage) in _COLLATERAL_SPOT_PAIRS.items():
-        if name.upper() == token_name.upper():
-            return slippage
-    return 0.002  # default: tight
+    entry = _COLLATERAL_BY_NAME.get(token_name.upper())
+    return entry[3] if entry else 0.002  # default: tight
+
+
+
+_ASSET_ID_RE = re.compile(r'asset=(\d+)')
+
 
+@lru_cache(maxsize=None)
+def _native_asset_names(info) -> list:
+    """Native perp names indexed by asset id, built once per process from the cached meta."""
+    return [a.get('name', f'#{i}') for i, a in enumerate(info.meta().get('universe', []))]
 
 
 def _humanize_error(error_text: str, info) -> str:
@@ -1080,17 +1695,14 @@ def _humanize_error(error_text: str, info) -> str:
     e.g. 'Order must have minimum value of $10. asset=184'
       -> 'Order must have minimum value of $10. asset=OM'
     """
-    import re
-    match = re.search(r'asset=(\d+)', error_text)
+    match = _ASSET_ID_RE.search(error_text)
     if not match:
         return error_text
     asset_id = int(match.group(1))
     try:
-        meta = info.meta_and_asset_ctxs()
-        universe = meta[0]['universe']
-        if 0 <= asset_id < len(universe):
-            name = universe[asset_id].get('name', f'#{asset_id}')
-            return error_text.replace(f'asset={asset_id}', f'asset={name}')
+        names = _native_asset_names(info)
+        if 0 <= asset_id < len(names):
+            return error_text.replace(f'asset={asset_id}', f'asset={names[asset_id]}')
     except Exception:
         pass
     return error_text
@@ -1107,11 +1719,15 @@ def _handle_margin_error(error_text, coin, info, config):
 
     dex = coin.split(':')[0]
     try:
-        token_idx, token_name, spot_pair = _get_dex_collateral(info, dex)
+        # Balances only matter for non-USDC collateral, but reading them
+        # alongside the dex meta keeps this path to a single round trip
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            spot_future = pool.submit(info.spot_user_state, config['account_address'])
+            token_idx, token_name, spot_pair = _get_dex_collateral(info, dex)
         if token_idx == 0:
             return  # USDC collateral, nothing special to say
 
-        spot_state = info.spot_user_state(config['account_address'])
+        spot_state = spot_future.result()
         collateral_free = 0
         usdc_free = 0
         for b in spot_state.get('balances', []):
@@ -1124,7 +1740,7 @@ def _handle_margin_error(error_text, coin, info, config):
 
         print(f"\n{Colors.YELLOW}{dex} dex uses {token_name} as collateral (not USDC).")
         print(f"  {token_name} balance: {collateral_free:.2f}")
-        print(f"  USDC balance: {format_price(usdc_free)}")
+        print(f"  USDC balance: {_fmt_usd(usdc_free)}")
         if spot_pair:
             print(f"  Swap USDC first: hyperliquid_tools.py swap <amount> --token {token_name}{Colors.END}")
         else:
@@ -1133,195 +1749,156 @@ def _handle_margin_error(error_text, coin, info, config):
         pass
 
 
-def cmd_buy(args):
-    """Market buy."""
+_STATUS_KINDS = ('resting', 'filled', 'error')
+
+
+def _report_statuses(result: dict, handlers: dict) -> None:
+    """Dispatch each per-order status of an ok exchange response to handlers[kind]."""
+    for status in result.get('response', {}).get('data', {}).get('statuses', []):
+        if not isinstance(status, dict):
+            continue
+        kind = next((k for k in _STATUS_KINDS if k in status), None)
+        handler = handlers.get(kind)
+        if handler:
+            handler(status[kind])
+
+
+def _on_filled(title: str, coin: str, show_oid: bool = False) -> Callable[[dict], None]:
+    """Status handler printing a fill summary."""
+    def _print(filled):
+        print(f"\n{Colors.GREEN}{title}{Colors.END}")
+        print(f"  Size: {filled.get('totalSz')}")
+        print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
+        if show_oid:
+            print(f"  OID: {filled.get('oid')}")
+    return _print
+
+
+def _on_resting(title: str) -> Callable[[dict], None]:
+    """Status handler printing a resting order's oid."""
+    def _print(resting):
+        print(f"\n{Colors.GREEN}{title}{Colors.END}")
+        print(f"  OID: {resting.get('oid')}")
+    return _print
+
+
+def _on_error(info, coin: Optional[str] = None, config: Optional[dict] = None) -> Callable[[str], None]:
+    """Status handler printing a humanized error (plus margin hints when config is given)."""
+    def _print(error):
+        print(f"\n{Colors.RED}Error: {_humanize_error(error, info)}{Colors.END}")
+        if config is not None:
+            _handle_margin_error(error, coin, info, config)
+    return _print
+
+
+def _place_order(args, is_buy: bool, limit_price: Optional[float] = None):
+    """Shared core for buy/sell (market, limit_price=None) and limit-buy/limit-sell (GTC)."""
     exchange, info, config = setup_exchange()
     coin = args.coin
     size = args.size
+    side = "Buy" if is_buy else "Sell"
+    is_market = limit_price is None
 
-    print(f"\n{Colors.BOLD}Market Buy: {size} {coin}{Colors.END}")
+    if is_market:
+        print(f"\n{Colors.BOLD}Market {side}: {size} {coin}{Colors.END}")
+    else:
+        print(f"\n{Colors.BOLD}Limit {side}: {size} {coin} @ {format_price(limit_price)}{Colors.END}")
     if config['is_testnet']:
         print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
 
+    # The reference price is only printed, so fetch it in the background
+    # instead of putting an extra round trip in front of the order.
+    pool = ThreadPoolExecutor(max_workers=1)
+    mids_future = pool.submit(info.all_mids, coin.split(':')[0] if ':' in coin else '')
+    pool.shutdown(wait=False)
+
     try:
-        # Set leverage if specified
-        if args.leverage:
+        # Set leverage if specified (market orders only)
+        if is_market and args.leverage:
             if not _set_leverage(exchange, coin, args.leverage, not getattr(args, 'isolated', False)):
                 return
 
-        # Get current price for reference
-        if ':' in coin:
-            dex = coin.split(':')[0]
-            all_mids = info.all_mids(dex=dex)
+        if is_market:
+            result = exchange.market_open(coin, is_buy, size, None, 0.01)  # 1% slippage
         else:
-            all_mids = info.all_mids()
+            result = exchange.order(coin, is_buy, size, limit_price, {"limit": {"tif": "Gtc"}})
+
+        # Reference price (skipped if the fetch failed or is still in flight)
+        try:
+            all_mids = mids_future.result(timeout=0.5)
+        except Exception:
+            all_mids = {}
         current_price = float(all_mids[coin]) if coin in all_mids else None
 
         if current_price:
-            print(f"Current price: {format_price(current_price)}")
-            print(f"Estimated cost: {format_price(current_price * size)}")
-
-        # Execute market buy
-        result = exchange.market_open(coin, True, size, None, 0.01)  # 1% slippage
+            if is_market:
+                print(f"Current price: {format_price(current_price)}")
+                if is_buy:
+                    print(f"Estimated cost: {_fmt_usd(current_price * size)}")
+            else:
+                diff_pct = ((limit_price - current_price) / current_price) * 100
+                print(f"Current price: {format_price(current_price)} ({diff_pct:+.2f}% from limit)")
 
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'filled' in status:
-                    filled = status['filled']
-                    print(f"\n{Colors.GREEN}Order filled!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
-                    print(f"  OID: {filled.get('oid')}")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
-                    _handle_margin_error(status['error'], coin, info, config)
+            _report_statuses(result, {
+                'resting': _on_resting("Order placed!"),
+                'filled': _on_filled("Order filled!" if is_market else "Order filled immediately!", coin, show_oid=is_market),
+                'error': _on_error(info, coin, config if is_market else None),
+            })
         else:
-            error_text = str(result)
             print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
-            _handle_margin_error(error_text, coin, info, config)
+            if is_market:
+                _handle_margin_error(str(result), coin, info, config)
 
     except Exception as e:
-        print(f"{Colors.RED}Error executing buy: {e}{Colors.END}")
-
-
-def cmd_sell(args):
-    """Market sell."""
-    exchange, info, config = setup_exchange()
-    coin = args.coin
-    size = args.size
-
-    print(f"\n{Colors.BOLD}Market Sell: {size} {coin}{Colors.END}")
-    if config['is_testnet']:
-        print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
-
-    try:
-        # Set leverage if specified
-        if args.leverage:
-            if not _set_leverage(exchange, coin, args.leverage, not getattr(args, 'isolated', False)):
-                return
-
-        # Get current price for reference
-        if ':' in coin:
-            dex = coin.split(':')[0]
-            all_mids = info.all_mids(dex=dex)
+        if is_market:
+            print(f"{Colors.RED}Error executing {side.lower()}: {e}{Colors.END}")
         else:
-            all_mids = info.all_mids()
-        current_price = float(all_mids[coin]) if coin in all_mids else None
+            print(f"{Colors.RED}Error placing limit {side.lower()}: {e}{Colors.END}")
 
-        if current_price:
-            print(f"Current price: {format_price(current_price)}")
 
-        # Execute market sell
-        result = exchange.market_open(coin, False, size, None, 0.01)  # 1% slippage
+def cmd_buy(args):
+    """Market buy."""
+    _place_order(args, True)
 
-        if result.get('status') == 'ok':
-            _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'filled' in status:
-                    filled = status['filled']
-                    print(f"\n{Colors.GREEN}Order filled!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
-                    print(f"  OID: {filled.get('oid')}")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
-                    _handle_margin_error(status['error'], coin, info, config)
-        else:
-            error_text = str(result)
-            print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
-            _handle_margin_error(error_text, coin, info, config)
 
-    except Exception as e:
-        print(f"{Colors.RED}Error executing sell: {e}{Colors.END}")
+def cmd_sell(args):
+    """Market sell."""
+    _place_order(args, False)
 
 
 def cmd_limit_buy(args):
     """Place limit buy order."""
-    exchange, info, config = setup_exchange()
-    coin = args.coin
-    size = args.size
-    price = args.price
-
-    print(f"\n{Colors.BOLD}Limit Buy: {size} {coin} @ {format_price(price)}{Colors.END}")
-    if config['is_testnet']:
-        print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
-
-    try:
-        # Get current price for reference
-        all_mids = info.all_mids()
-        if coin in all_mids:
-            current_price = float(all_mids[coin])
-            diff_pct = ((price - current_price) / current_price) * 100
-            print(f"Current price: {format_price(current_price)} ({diff_pct:+.2f}% from limit)")
+    _place_order(args, True, args.price)
 
-        # Place limit order
-        result = exchange.order(coin, True, size, price, {"limit": {"tif": "Gtc"}})
-
-        if result.get('status') == 'ok':
-            _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'resting' in status:
-                    print(f"\n{Colors.GREEN}Order placed!{Colors.END}")
-                    print(f"  OID: {status['resting'].get('oid')}")
-                elif 'filled' in status:
-                    filled = status['filled']
-                    print(f"\n{Colors.GREEN}Order filled immediately!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
-        else:
-            print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
-
-    except Exception as e:
-        print(f"{Colors.RED}Error placing limit buy: {e}{Colors.END}")
-
-
-def cmd_limit_sell(args):
-    """Place limit sell order."""
-    exchange, info, config = setup_exchange()
-    coin = args.coin
-    size = args.size
-    price = args.price
 
-    print(f"\n{Colors.BOLD}Limit Sell: {size} {coin} @ {format_price(price)}{Colors.END}")
-    if config['is_testnet']:
-        print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
+def cmd_limit_sell(args):
+    """Place limit sell order."""
+    _place_order(args, False, args.price)
 
-    try:
-        # Get current price for reference
-        all_mids = info.all_mids()
-        if coin in all_mids:
-            current_price = float(all_mids[coin])
-            diff_pct = ((price - current_price) / current_price) * 100
-            print(f"Current price: {format_price(current_price)} ({diff_pct:+.2f}% from limit)")
 
-        # Place limit order
-        result = exchange.order(coin, False, size, price, {"limit": {"tif": "Gtc"}})
+def _print_trigger_placed(label: str, coin: str, is_buy: bool, trigger_price: float, size: float, resting: dict):
+    """Confirmation block for a resting stop-loss / take-profit trigger."""
+    side = "BUY (close short)" if is_buy else "SELL (close long)"
+    print(f"\n{Colors.GREEN}{label} placed!{Colors.END}")
+    print(f"  Side: {side}")
+    print(f"  Trigger: {format_price(trigger_price)}")
+    print(f"  Size: {size}")
+    print(f"  OID: {resting.get('oid')}")
+    print(f"  Type: Market order when triggered")
 
-        if result.get('status') == 'ok':
-            _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'resting' in status:
-                    print(f"\n{Colors.GREEN}Order placed!{Colors.END}")
-                    print(f"  OID: {status['resting'].get('oid')}")
-                elif 'filled' in status:
-                    filled = status['filled']
-                    print(f"\n{Colors.GREEN}Order filled immediately!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
-        else:
-            print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
 
-    except Exception as e:
-        print(f"{Colors.RED}Error placing limit sell: {e}{Colors.END}")
+def _tpsl_request(coin: str, is_buy: bool, size: float, trigger_price: float, tpsl: str) -> dict:
+    """Reduce-only trigger order (market when hit) for exchange.bulk_orders; tpsl is 'sl' or 'tp'."""
+    return {
+        "coin": coin,
+        "is_buy": is_buy,
+        "sz": size,
+        "limit_px": trigger_price,
+        "order_type": {"trigger": {"triggerPx": trigger_price, "isMarket": True, "tpsl": tpsl}},
+        "reduce_only": True,
+    }
 
 
 def cmd_stop_loss(args):
@@ -1347,30 +1924,14 @@ def cmd_stop_loss(args):
         # If trigger is above current price, it's a buy stop (closing a short)
         is_buy = trigger_price > current_price if coin in all_mids else not args.buy
 
-        order_type = {
-            "trigger": {
-                "triggerPx": trigger_price,
-                "isMarket": True,
-                "tpsl": "sl"
-            }
-        }
-
-        result = exchange.order(coin, is_buy, size, trigger_price, order_type, reduce_only=True)
+        result = exchange.bulk_orders([_tpsl_request(coin, is_buy, size, trigger_price, "sl")])
 
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'resting' in status:
-                    side = "BUY (close short)" if is_buy else "SELL (close long)"
-                    print(f"\n{Colors.GREEN}Stop-loss placed!{Colors.END}")
-                    print(f"  Side: {side}")
-                    print(f"  Trigger: {format_price(trigger_price)}")
-                    print(f"  Size: {size}")
-                    print(f"  OID: {status['resting'].get('oid')}")
-                    print(f"  Type: Market order when triggered")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
+            _report_statuses(result, {
+                'resting': lambda resting: _print_trigger_placed("Stop-loss", coin, is_buy, trigger_price, size, resting),
+                'error': _on_error(info),
+            })
         else:
             print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
 
@@ -1401,35 +1962,82 @@ def cmd_take_profit(args):
         # If trigger is below current price, it's a buy (closing a short)
         is_buy = trigger_price < current_price if coin in all_mids else args.buy
 
-        order_type = {
-            "trigger": {
-                "triggerPx": trigger_price,
-                "isMarket": True,
-                "tpsl": "tp"
-            }
-        }
+        result = exchange.bulk_orders([_tpsl_request(coin, is_buy, size, trigger_price, "tp")])
+
+        if result.get('status') == 'ok':
+            _invalidate_proxy_cache(config)
+            _report_statuses(result, {
+                'resting': lambda resting: _print_trigger_placed("Take-profit", coin, is_buy, trigger_price, size, resting),
+                'error': _on_error(info),
+            })
+        else:
+            print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
+
+    except Exception as e:
+        print(f"{Colors.RED}Error placing take-profit: {e}{Colors.END}")
+
+
+def cmd_bracket(args):
+    """Market entry plus stop-loss and take-profit triggers, sent as one signed batch."""
+    exchange, info, config = setup_exchange()
+    coin = args.coin
+    is_buy = args.side == 'buy'
+    size = args.size
+
+    print(f"\n{Colors.BOLD}Bracket {'Buy' if is_buy else 'Sell'}: {size} {coin} | "
+          f"SL {format_price(args.sl)} | TP {format_price(args.tp)}{Colors.END}")
+    if config['is_testnet']:
+        print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
+
+    # A long is stopped below and takes profit above; a short the reverse
+    if (args.sl < args.tp) != is_buy:
+        print(f"{Colors.RED}Error: for a {'long' if is_buy else 'short'} the stop-loss must be "
+              f"{'below' if is_buy else 'above'} the take-profit{Colors.END}")
+        return
+
+    try:
+        if args.leverage:
+            if not _set_leverage(exchange, coin, args.leverage, not args.isolated):
+                return
 
-        result = exchange.order(coin, is_buy, size, trigger_price, order_type, reduce_only=True)
+        # Entry is the same aggressive IOC limit market_open sends (1% slippage);
+        # normalTpsl grouping ties the triggers to it, so they close what it opens
+        entry_px = _ioc_price(info, coin, is_buy)
+        order_requests = [
+            {
+                "coin": coin,
+                "is_buy": is_buy,
+                "sz": size,
+                "limit_px": entry_px,
+                "order_type": {"limit": {"tif": "Ioc"}},
+                "reduce_only": False,
+            },
+            _tpsl_request(coin, not is_buy, size, args.sl, "sl"),
+            _tpsl_request(coin, not is_buy, size, args.tp, "tp"),
+        ]
+        result = exchange.bulk_orders(order_requests, grouping="normalTpsl")
 
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
             statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'resting' in status:
-                    side = "BUY (close short)" if is_buy else "SELL (close long)"
-                    print(f"\n{Colors.GREEN}Take-profit placed!{Colors.END}")
-                    print(f"  Side: {side}")
-                    print(f"  Trigger: {format_price(trigger_price)}")
-                    print(f"  Size: {size}")
-                    print(f"  OID: {status['resting'].get('oid')}")
-                    print(f"  Type: Market order when triggered")
+            for label, status in zip(("Entry", "Stop-loss", "Take-profit"), statuses):
+                if not isinstance(status, dict):
+                    print(f"  {label}: {status}")  # e.g. waitingForFill
+                elif 'filled' in status:
+                    filled = status['filled']
+                    print(f"  {Colors.GREEN}{label} filled{Colors.END}: {filled.get('totalSz')} @ {format_price(float(filled.get('avgPx', 0)))}")
+                elif 'resting' in status:
+                    print(f"  {Colors.GREEN}{label} placed{Colors.END} (OID: {status['resting'].get('oid')})")
                 elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
+                    print(f"  {Colors.RED}{label} failed: {_humanize_error(status['error'], info)}{Colors.END}")
+                    if label == "Entry":
+                        _handle_margin_error(status['error'], coin, info, config)
         else:
-            print(f"\n{Colors.RED}Order failed: {result}{Colors.END}")
+            print(f"\n{Colors.RED}Bracket failed: {result}{Colors.END}")
+            _handle_margin_error(str(result), coin, info, config)
 
     except Exception as e:
-        print(f"{Colors.RED}Error placing take-profit: {e}{Colors.END}")
+        print(f"{Colors.RED}Error placing bracket: {e}{Colors.END}")
 
 
 def cmd_close(args):
@@ -1452,12 +2060,8 @@ def cmd_close(args):
         else:
             user_state = info.user_state(config['account_address'])
         positions = user_state.get('assetPositions', [])
-
-        position = None
-        for pos in positions:
-            if pos['position']['coin'] == coin:
-                position = pos['position']
-                break
+        by_coin = {p['position']['coin']: p['position'] for p in positions}
+        position = by_coin.get(coin)
 
         if not position or float(position['szi']) == 0:
             print(f"{Colors.YELLOW}No open position for {coin}{Colors.END}")
@@ -1476,15 +2080,10 @@ def cmd_close(args):
 
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
-            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
-                if 'filled' in status:
-                    filled = status['filled']
-                    print(f"\n{Colors.GREEN}Position closed!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
-                elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
+            _report_statuses(result, {
+                'filled': _on_filled("Position closed!", coin),
+                'error': _on_error(info),
+            })
         else:
             print(f"\n{Colors.RED}Close failed: {result}{Colors.END}")
 
@@ -1500,12 +2099,8 @@ def cmd_cancel(args):
     # Need to find the coin for this order
     try:
         open_orders = info.open_orders(config['account_address'])
-
-        order = None
-        for o in open_orders:
-            if str(o.get('oid')) == str(oid):
-                order = o
-                break
+        by_oid = {str(o.get('oid')): o for o in open_orders}
+        order = by_oid.get(str(oid))
 
         if not order:
             print(f"{Colors.YELLOW}Order {oid} not found in open orders{Colors.END}")
@@ -1551,18 +2146,36 @@ def cmd_cancel_all(args):
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
             statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for i, status in enumerate(statuses):
-                coin = cancel_requests[i]['coin'] if i < len(cancel_requests) else '?'
-                oid = cancel_requests[i]['oid'] if i < len(cancel_requests) else '?'
-                if status == 'success':
-                    print(f"  {Colors.GREEN}Canceled {coin} order {oid}{Colors.END}")
-                elif isinstance(status, dict) and 'error' in status:
+            for req, status in zip(cancel_requests, statuses):
+                coin, oid = req['coin'], req['oid']
+                if isinstance(status, dict) and 'error' in status:
                     print(f"  {Colors.RED}Failed {coin} order {oid}: {_humanize_error(status['error'], info)}{Colors.END}")
                 else:
                     print(f"  {Colors.GREEN}Canceled {coin} order {oid}{Colors.END}")
             print(f"\n{Colors.GREEN}Done!{Colors.END}")
         else:
-            print(f"{Colors.RED}Bulk cancel failed: {result}{Colors.END}")
+            # The whole batch was rejected; retry order by order so one bad
+            # entry doesn't leave every other order resting on the book
+            print(f"{Colors.YELLOW}Bulk cancel failed: {result}{Colors.END}")
+            print(f"{Colors.DIM}Falling back to individual cancels...{Colors.END}")
+            canceled = 0
+            for req in cancel_requests:
+                coin, oid = req['coin'], req['oid']
+                try:
+                    single = exchange.cancel(coin, oid)
+                except Exception as e:
+                    single = {'status': 'err', 'response': str(e)}
+                if single.get('status') != 'ok':
+                    print(f"  {Colors.RED}Failed {coin} order {oid}: {single.get('response', single)}{Colors.END}")
+                    continue
+                status = (single.get('response', {}).get('data', {}).get('statuses') or [None])[0]
+                if isinstance(status, dict) and 'error' in status:
+                    print(f"  {Colors.RED}Failed {coin} order {oid}: {_humanize_error(status['error'], info)}{Colors.END}")
+                else:
+                    canceled += 1
+                    print(f"  {Colors.GREEN}Canceled {coin} order {oid}{Colors.END}")
+            if canceled:
+                _invalidate_proxy_cache(config)
 
     except Exception as e:
         print(f"{Colors.RED}Error canceling orders: {e}{Colors.END}")
@@ -1578,12 +2191,8 @@ def cmd_modify_order(args):
     try:
         # Find the existing order to get coin and side
         open_orders = info.frontend_open_orders(config['account_address'])
-
-        order = None
-        for o in open_orders:
-            if o.get('oid') == oid:
-                order = o
-                break
+        by_oid = {o.get('oid'): o for o in open_orders}
+        order = by_oid.get(oid)
 
         if not order:
             print(f"{Colors.YELLOW}Order {oid} not found in open orders{Colors.END}")
@@ -1610,23 +2219,153 @@ def cmd_modify_order(args):
 
         if result.get('status') == 'ok':
             _invalidate_proxy_cache(config)
+            _report_statuses(result, {
+                'resting': _on_resting("Order modified!"),
+                'filled': _on_filled("Modified order filled immediately!", coin),
+                'error': _on_error(info),
+            })
+        else:
+            print(f"\n{Colors.RED}Modify failed: {result}{Colors.END}")
+
+    except Exception as e:
+        print(f"{Colors.RED}Error modifying order: {e}{Colors.END}")
+
+
+def cmd_replace(args):
+    """Replace all resting limit orders on a coin with a new set of GTC limits.
+
+    Sends one signed bulk cancel and one signed bulk order instead of a
+    cancel + order round trip per level. TP/SL trigger orders are kept.
+    """
+    exchange, info, config = setup_exchange()
+    coin = args.coin
+    is_buy = args.side == 'buy'
+    size = args.size
+    prices = args.prices
+
+    print(f"\n{Colors.BOLD}Replacing {coin} orders: {args.side} {size} @ {', '.join(format_price(p) for p in prices)}{Colors.END}")
+    if config['is_testnet']:
+        print(f"{Colors.YELLOW}[TESTNET]{Colors.END}")
+
+    try:
+        dex = coin.split(':')[0] if ':' in coin else ''
+        open_orders = info.frontend_open_orders(config['account_address'], dex=dex)
+        cancel_requests = [
+            {"coin": o['coin'], "oid": int(o['oid'])}
+            for o in open_orders
+            if o.get('coin') == coin and not o.get('isTrigger')
+        ]
+
+        if cancel_requests:
+            result = exchange.bulk_cancel(cancel_requests)
+            if result.get('status') != 'ok':
+                print(f"{Colors.RED}Cancel failed, no new orders placed: {result}{Colors.END}")
+                return
             statuses = result.get('response', {}).get('data', {}).get('statuses', [])
-            for status in statuses:
+            for req, status in zip(cancel_requests, statuses):
+                if isinstance(status, dict) and 'error' in status:
+                    print(f"  {Colors.YELLOW}Could not cancel order {req['oid']}: {_humanize_error(status['error'], info)}{Colors.END}")
+                else:
+                    print(f"  Canceled order {req['oid']}")
+        else:
+            print(f"  {Colors.DIM}No resting {coin} orders to cancel{Colors.END}")
+
+        order_requests = [
+            {
+                "coin": coin,
+                "is_buy": is_buy,
+                "sz": size,
+                "limit_px": px,
+                "order_type": {"limit": {"tif": "Gtc"}},
+                "reduce_only": False,
+            }
+            for px in prices
+        ]
+        result = exchange.bulk_orders(order_requests)
+        _invalidate_proxy_cache(config)
+
+        if result.get('status') == 'ok':
+            statuses = result.get('response', {}).get('data', {}).get('statuses', [])
+            for req, status in zip(order_requests, statuses):
+                px_str = format_price(req['limit_px'])
                 if 'resting' in status:
-                    print(f"\n{Colors.GREEN}Order modified!{Colors.END}")
-                    print(f"  OID: {status['resting'].get('oid')}")
+                    print(f"  {Colors.GREEN}Placed {px_str}{Colors.END} (OID: {status['resting'].get('oid')})")
                 elif 'filled' in status:
                     filled = status['filled']
-                    print(f"\n{Colors.GREEN}Modified order filled immediately!{Colors.END}")
-                    print(f"  Size: {filled.get('totalSz')}")
-                    print(f"  Avg Price: {format_price(float(filled.get('avgPx', 0)))}")
+                    print(f"  {Colors.GREEN}Filled {px_str}{Colors.END}: {filled.get('totalSz')} @ {format_price(float(filled.get('avgPx', 0)))}")
                 elif 'error' in status:
-                    print(f"\n{Colors.RED}Error: {_humanize_error(status['error'], info)}{Colors.END}")
+                    print(f"  {Colors.RED}Failed {px_str}: {_humanize_error(status['error'], info)}{Colors.END}")
         else:
-            print(f"\n{Colors.RED}Modify failed: {result}{Colors.END}")
+            print(f"\n{Colors.RED}Order batch failed: {result}{Colors.END}")
 
     except Exception as e:
-        print(f"{Colors.RED}Error modifying order: {e}{Colors.END}")
+        print(f"{Colors.RED}Error replacing orders: {e}{Colors.END}")
+
+
+def _snapshot_mids(info, asset_ctxs: list, name_to_idx: dict, coins: list) -> dict:
+    """Mid prices for coins, taken from an asset-context snapshot where possible.
+
+    Falls back to a single allMids request only for coins the snapshot doesn't
+    cover (spot/HIP-3 names, or perps without a current mid).
+    """
+    mids = {}
+    for coin in coins:
+        idx = name_to_idx.get(coin)
+        if idx is not None and asset_ctxs[idx].get('midPx') is not None:
+            mids[coin] = asset_ctxs[idx]['midPx']
+    if len(mids) < len(coins):
+        all_mids = info.all_mids()
+        for coin in coins:
+            if coin not in mids and coin in all_mids:
+                mids[coin] = all_mids[coin]
+    return mids
+
+
+def _analyze_xyz_line(info_url: str, xyz_coin: str) -> Optional[str]:
+    """Fetch funding + book mid for one trade.xyz asset and format its analyze row."""
+    try:
+        funding = get_latest_funding(info_url, xyz_coin)
+        if funding is None:
+            return None
+        funding_pct = funding * 100
+        funding_apr = funding * _APR_SCALE
+
+        # Get price from L2 book
+        book = get_l2_book(info_url, xyz_coin)
+        price = 0
+        if book:
+            levels = book.get('levels', [])
+            if len(levels) >= 2 and levels[0] and levels[1]:
+                price = (float(levels[0][0]['px']) + float(levels[1][0]['px'])) / 2
+
+        return f"{xyz_coin:<12} ${price:>10,.2f} | Funding: {funding_pct:.4f}%/hr ({funding_apr:.1f}% APR)"
+    except (requests.RequestException, KeyError, IndexError, TypeError, ValueError) as e:
+        return f"{xyz_coin:<12} Error: {e}"
+
+
+def _analyze_book_line(info, coin: str) -> Optional[str]:
+    """Summarize spread/depth/imbalance of one order book for cmd_analyze."""
+    try:
+        book = info.l2_snapshot(coin)
+        bids = book.get('levels', [[]])[0]
+        asks = book.get('levels', [[], []])[1]
+        if not (bids and asks):
+            return None
+
+        best_bid = float(bids[0]['px'])
+        best_ask = float(asks[0]['px'])
+        # spread / mid in bps, without the intermediate mid/spread values
+        spread_bps = (best_ask - best_bid) * 20000 / (best_ask + best_bid)
+
+        # Sum depth (map/itemgetter keeps the loop in C)
+        bid_depth = sum(map(float, map(_LEVEL_SZ, bids[:10])))
+        ask_depth = sum(map(float, map(_LEVEL_SZ, asks[:10])))
+        total_depth = bid_depth + ask_depth
+        imbalance = (bid_depth - ask_depth) / total_depth if total_depth > 0 else 0
+
+        return f"{coin}: Spread {spread_bps:.1f}bps | Bid depth: {bid_depth:.2f} | Ask depth: {ask_depth:.2f} | Imbalance: {imbalance:+.2%}"
+    except Exception:
+        return None
 
 
 def cmd_analyze(args):
@@ -1673,98 +2412,55 @@ def cmd_analyze(args):
             print(f"{Colors.DIM}No credentials configured - skipping account state{Colors.END}")
             print(f"Add HL_ACCOUNT_ADDRESS and HL_SECRET_KEY to .env to see positions")
 
+        # One metaAndAssetCtxs snapshot feeds both the price and funding
+        # sections; allMids is only fetched for coins it doesn't cover.
+        meta = info.meta_and_asset_ctxs()
+        universe = meta[0]['universe']
+        asset_ctxs = meta[1]
+        name_to_idx = _index_assets(universe, coins)
+        mids = _snapshot_mids(info, asset_ctxs, name_to_idx, coins)
+
         # 2. All Prices
         print(f"\n{Colors.BOLD}=== CURRENT PRICES ==={Colors.END}")
-        all_mids = info.all_mids()
         for coin in coins:
-            if coin in all_mids:
-                print(f"{coin}: ${float(all_mids[coin]):,.2f}")
+            if coin in mids:
+                print(f"{coin}: ${float(mids[coin]):,.2f}")
 
         # 3. Funding Rates & Market Context
         print(f"\n{Colors.BOLD}=== FUNDING RATES & MARKET CONTEXT ==={Colors.END}")
-        meta = info.meta_and_asset_ctxs()
-        universe = meta[0]['universe']
-        asset_ctxs = meta[1]
-        name_to_idx = {asset['name']: i for i, asset in enumerate(universe)}
-
-        print(f"{'Asset':<10} {'Price':>12} {'Funding/hr':>12} {'Funding APR':>12} {'Open Interest':>15} {'24h Volume':>15}")
-        print("-" * 80)
 
+        out = [
+            f"{'Asset':<10} {'Price':>12} {'Funding/hr':>12} {'Funding APR':>12} {'Open Interest':>15} {'24h Volume':>15}",
+            "-" * 80,
+        ]
         for coin in coins:
             if coin in name_to_idx:
                 idx = name_to_idx[coin]
                 ctx = asset_ctxs[idx]
-                price = float(ctx.get('markPx', 0))
-                funding = float(ctx.get('funding', 0))
-                oi = float(ctx.get('openInterest', 0))
-                vol = float(ctx.get('dayNtlVlm', 0))
+                price = float(ctx['markPx'])
+                funding = float(ctx['funding'])
+                oi = float(ctx['openInterest'])
+                vol = float(ctx['dayNtlVlm'])
 
                 funding_pct = funding * 100
-                funding_apr = funding * 24 * 365 * 100
+                funding_apr = funding * _APR_SCALE
 
-                print(f"{coin:<10} ${price:>10,.2f} {funding_pct:>11.4f}% {funding_apr:>11.1f}% ${oi:>13,.0f} ${vol:>13,.0f}")
+                out.append(f"{coin:<10} ${price:>10,.2f} {funding_pct:>11.4f}% {funding_apr:>11.1f}% ${oi:>13,.0f} ${vol:>13,.0f}")
+        _emit(out)
 
         # 4. HIP-3 Equity Perps
         print(f"\n{Colors.BOLD}=== HIP-3 EQUITY PERPS (trade.xyz) ==={Colors.END}")
-        import requests
-        for xyz_coin in xyz_assets:
-            try:
-                # Get funding
-                resp = requests.post(
-                    config['api_url'] + "/info",
-                    json={"type": "fundingHistory", "coin": xyz_coin, "startTime": 0},
-                    timeout=10
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    if data:
-                        latest = data[-1]
-                        funding = float(latest.get('fundingRate', 0))
-                        funding_pct = funding * 100
-                        funding_apr = funding * 24 * 365 * 100
-
-                        # Get price from L2 book
-                        book_resp = requests.post(
-                            config['api_url'] + "/info",
-                            json={"type": "l2Book", "coin": xyz_coin},
-                            timeout=10
-                        )
-                        price = 0
-                        if book_resp.status_code == 200:
-                            book = book_resp.json()
-                            levels = book.get('levels', [])
-                            if len(levels) >= 2 and levels[0] and levels[1]:
-                                mid = (float(levels[0][0]['px']) + float(levels[1][0]['px'])) / 2
-                                price = mid
-
-                        print(f"{xyz_coin:<12} ${price:>10,.2f} | Funding: {funding_pct:.4f}%/hr ({funding_apr:.1f}% APR)")
-            except Exception as e:
-                print(f"{xyz_coin:<12} Error: {e}")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for line in pool.map(lambda c: _analyze_xyz_line(config['info_url'], c), xyz_assets):
+                if line:
+                    print(line)
 
         # 5. Order Book Depth (for major assets)
         print(f"\n{Colors.BOLD}=== ORDER BOOK SUMMARY ==={Colors.END}")
-        for coin in ['BTC', 'ETH', 'SOL']:
-            if coin in coins or True:  # Always show major assets
-                try:
-                    book = info.l2_snapshot(coin)
-                    bids = book.get('levels', [[]])[0]
-                    asks = book.get('levels', [[], []])[1]
-
-                    if bids and asks:
-                        best_bid = float(bids[0]['px'])
-                        best_ask = float(asks[0]['px'])
-                        mid = (best_bid + best_ask) / 2
-                        spread = best_ask - best_bid
-                        spread_bps = (spread / mid) * 10000
-
-                        # Sum depth
-                        bid_depth = sum(float(b['sz']) for b in bids[:10])
-                        ask_depth = sum(float(a['sz']) for a in asks[:10])
-                        imbalance = (bid_depth - ask_depth) / (bid_depth + ask_depth) if (bid_depth + ask_depth) > 0 else 0
-
-                        print(f"{coin}: Spread {spread_bps:.1f}bps | Bid depth: {bid_depth:.2f} | Ask depth: {ask_depth:.2f} | Imbalance: {imbalance:+.2%}")
-                except:
-                    pass
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            for line in pool.map(lambda c: _analyze_book_line(info, c), ['BTC', 'ETH', 'SOL']):  # Always show major assets
+                if line:
+                    print(line)
 
         # 6. Recent Price Changes (from candles if available)
         print(f"\n{Colors.BOLD}=== NOTES FOR ANALYSIS ==={Colors.END}")
@@ -1784,7 +2480,6 @@ For sentiment analysis (slower, uses Grok):
 
     except Exception as e:
         print(f"{Colors.RED}Error during analysis: {e}{Colors.END}")
-        import traceback
         traceback.print_exc()
 
 
@@ -1797,45 +2492,45 @@ def cmd_raw(args):
     print("=" * 60)
 
     try:
+        meta = info.meta_and_asset_ctxs()
+        universe = meta[0]['universe']
+        asset_ctxs = meta[1]
+        name_to_idx = _index_assets(universe, [coin])
+
         # Price
-        all_mids = info.all_mids()
-        if coin in all_mids:
+        mids = _snapshot_mids(info, asset_ctxs, name_to_idx, [coin])
+        if coin in mids:
             print(f"\n--- Price ---")
-            print(f"mid_price: {all_mids[coin]}")
+            print(f"mid_price: {mids[coin]}")
 
         # Meta and context
-        meta = info.meta_and_asset_ctxs()
-        universe = meta[0]['universe']
-        asset_ctxs = meta[1]
-        name_to_idx = {asset['name']: i for i, asset in enumerate(universe)}
 
         if coin in name_to_idx:
             idx = name_to_idx[coin]
             print(f"\n--- Asset Metadata ---")
-            print(json.dumps(universe[idx], indent=2))
+            print(_json_dumps(universe[idx]))
             print(f"\n--- Asset Context ---")
-            print(json.dumps(asset_ctxs[idx], indent=2))
+            print(_json_dumps(asset_ctxs[idx]))
 
         # Order book
         print(f"\n--- L2 Book (Top 5) ---")
         book = info.l2_snapshot(coin)
-        print(json.dumps({
+        print(_json_dumps({
             'bids': book.get('levels', [[]])[0][:5],
             'asks': book.get('levels', [[], []])[1][:5]
-        }, indent=2))
+        }))
 
         # Recent trades
         print(f"\n--- Recent Trades (Last 10) ---")
-        # Note: SDK might not have this, using requests
-        import requests
-        resp = requests.post(
-            config['api_url'] + "/info",
+        # Note: SDK might not have this, using a direct request
+        resp = _http_session().post(
+            config['info_url'],
             json={"type": "recentTrades", "coin": coin},
             timeout=10
         )
         if resp.status_code == 200:
-            trades = resp.json()[-10:]
-            print(json.dumps(trades, indent=2))
+            trades = _json_loads(resp.content)[-10:]
+            print(_json_dumps(trades))
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -1955,7 +2650,7 @@ def cmd_funding_history(args):
             ts = datetime.fromtimestamp(entry['time'] / 1000).strftime('%Y-%m-%d %H:%M')
             rate = float(entry['fundingRate'])
             premium = float(entry['premium'])
-            annual = rate * 8760 * 100  # hourly rate * hours/year * 100 for %
+            annual = rate * _APR_SCALE
             rates.append(rate)
 
             color = Colors.GREEN if rate >= 0 else Colors.RED
@@ -1963,7 +2658,7 @@ def cmd_funding_history(args):
 
         # Summary
         avg_rate = sum(rates) / len(rates) if rates else 0
-        avg_annual = avg_rate * 8760 * 100
+        avg_annual = avg_rate * _APR_SCALE
         max_rate = max(rates) if rates else 0
         min_rate = min(rates) if rates else 0
         color = Colors.GREEN if avg_rate >= 0 else Colors.RED
@@ -2009,15 +2704,13 @@ def cmd_trades(args):
             value = px * sz
 
             if side == 'B':
-                color = Colors.GREEN
-                side_label = "BUY"
+                side_col = _BUY_COL
                 total_buy_vol += value
             else:
-                color = Colors.RED
-                side_label = "SELL"
+                side_col = _SELL_COL
                 total_sell_vol += value
 
-            print(f"  {ts:<22} {color}{side_label:<6}{Colors.END} ${px:>13,.2f} {sz:>12} ${value:>13,.2f}")
+            print(f"  {ts:<22} {side_col} ${px:>13,.2f} {sz:>12} ${value:>13,.2f}")
 
         # Summary
         total_vol = total_buy_vol + total_sell_vol
@@ -2175,27 +2868,69 @@ def _cmd_scan_sorted(assets, hip3_data, sort_key, reverse, top_n, min_volume):
 
     # Sort key mapping with default directions
     sort_cfg = {
-        'funding':      (lambda x: x['funding_apr'], False),   # ascending (most negative first)
-        'volume':       (lambda x: x['volume'], True),          # descending
-        'oi':           (lambda x: x.get('oi_ntl', 0), True),    # descending (notional)
-        'price-change': (lambda x: x['pct_change'], True),     # descending
+        'funding':      (operator.itemgetter('funding_apr'), False),  # ascending (most negative first)
+        'volume':       (operator.itemgetter('volume'), True),        # descending
+        'oi':           (lambda x: x.get('oi_ntl', 0), True),         # descending (notional)
+        'price-change': (operator.itemgetter('pct_change'), True),    # descending
     }
     key_fn, default_desc = sort_cfg[sort_key]
     descending = not default_desc if reverse else default_desc
 
-    merged.sort(key=key_fn, reverse=descending)
-    rows = merged[:top_n]
+    # Partial selection of the top rows instead of sorting the whole list
+    select = heapq.nlargest if descending else heapq.nsmallest
+    rows = select(top_n, merged, key=key_fn)
 
     label = sort_key.upper().replace('-', ' ')
     direction = "descending" if descending else "ascending"
-    print(f"\n{Colors.BOLD}Sorted by {label} ({direction}) — top {top_n}:{Colors.END}")
-    print(f"{'Asset':<14} {'Price':>12} {'Funding APR':>12} {'OI':>14} {'Volume':>14} {'24h Chg':>9}")
-    print("-" * 79)
-
+    out = [
+        f"\n{Colors.BOLD}Sorted by {label} ({direction}) — top {top_n}:{Colors.END}",
+        f"{'Asset':<14} {'Price':>12} {'Funding APR':>12} {'OI':>14} {'Volume':>14} {'24h Chg':>9}",
+        "-" * 79,
+    ]
     for a in rows:
-        funding_color = Colors.GREEN if a['funding_apr'] < -10 else Colors.RED if a['funding_apr'] > 10 else Colors.YELLOW
+        funding_color = _FUND_COLORS[bisect.bisect_left(_FUND_EDGES, a['funding_apr'])]
         chg_color = Colors.GREEN if a['pct_change'] > 0 else Colors.RED if a['pct_change'] < 0 else Colors.END
-        print(f"{a['name']:<14} ${a['price']:>10,.2f} {funding_color}{a['funding_apr']:>11.1f}%{Colors.END} ${a.get('oi_ntl', 0):>12,.0f} ${a.get('volume', 0):>12,.0f} {chg_color}{a['pct_change']:>+8.2f}%{Colors.END}")
+        out.append(_SCAN_SORTED_ROW(fc=funding_color, cc=chg_color, **a))
+    _emit(out)
+
+
+def _scan_hip3_dex(info_url: str, dex: str) -> list:
+    """Fetch one HIP-3 dex's asset contexts and build cmd_scan rows (empty on failure)."""
+    rows = []
+    try:
+        dex_meta = get_dex_asset_ctxs(info_url, dex)
+        if not dex_meta:
+            return rows
+        dex_universe = dex_meta[0]['universe']
+        dex_ctxs = dex_meta[1]
+
+        for i, asset in enumerate(dex_universe):
+            coin = asset.get('name', '')
+            if not coin:
+                continue
+            ctx = dex_ctxs[i]
+            funding = float(ctx.get('funding', 0))
+            price = float(ctx.get('markPx', 0))
+            h3_oi = float(ctx.get('openInterest', 0))
+            h3_volume = float(ctx.get('dayNtlVlm', 0))
+            h3_prev_px = float(ctx.get('prevDayPx', 0))
+            h3_pct_change = ((price - h3_prev_px) / h3_prev_px * 100) if h3_prev_px else 0.0
+            funding_hr = funding * 100
+            funding_apr = funding * _APR_SCALE
+
+            rows.append({
+                'name': coin,
+                'price': price,
+                'funding_hr': funding_hr,
+                'funding_apr': funding_apr,
+                'oi': h3_oi,
+                'oi_ntl': h3_oi * price,
+                'volume': h3_volume,
+                'pct_change': h3_pct_change,
+            })
+    except Exception:
+        pass
+    return rows
 
 
 def cmd_scan(args):
@@ -2215,34 +2950,33 @@ def cmd_scan(args):
         universe = meta[0]['universe']
         contexts = meta[1]
 
+        # contexts is dense and aligned with universe, and every native
+        # context carries these fields, so index directly.
         assets = []
-        for i, asset in enumerate(universe):
-            ctx = contexts[i]
-            name = asset['name']
-            funding = float(ctx.get('funding', 0))
-            mark_px = float(ctx.get('markPx', 0))
-            oi = float(ctx.get('openInterest', 0))
-            volume = float(ctx.get('dayNtlVlm', 0))
-            prev_px = float(ctx.get('prevDayPx', 0))
+        for asset, ctx in zip(universe, contexts):
+            volume = float(ctx['dayNtlVlm'])
+            if volume < min_volume:
+                continue
+            funding = float(ctx['funding'])
+            mark_px = float(ctx['markPx'])
+            oi = float(ctx['openInterest'])
+            prev_px = float(ctx['prevDayPx'])
             pct_change = ((mark_px - prev_px) / prev_px * 100) if prev_px else 0.0
 
-            if volume >= min_volume:
-                assets.append({
-                    'name': name,
-                    'price': mark_px,
-                    'funding_hr': funding * 100,
-                    'funding_apr': funding * 24 * 365 * 100,
-                    'oi': oi,
-                    'oi_ntl': oi * mark_px,
-                    'volume': volume,
-                    'pct_change': pct_change,
-                })
+            assets.append({
+                'name': asset['name'],
+                'price': mark_px,
+                'funding_hr': funding * 100,
+                'funding_apr': funding * _APR_SCALE,
+                'oi': oi,
+                'oi_ntl': oi * mark_px,
+                'volume': volume,
+                'pct_change': pct_change,
+            })
 
         print(f"\nTotal perps: {len(universe)} | With sufficient volume: {len(assets)}")
 
         # HIP-3 Perps (all dexes) — bulk fetch via metaAndAssetCtxs
-        import requests as req
-
         hip3_data = []
         try:
             all_dexes = info.perp_dexs()
@@ -2250,45 +2984,10 @@ def cmd_scan(args):
         except Exception:
             dex_names = ['xyz']
 
-        for dex in dex_names:
-            try:
-                resp = req.post(
-                    config['api_url'] + "/info",
-                    json={"type": "metaAndAssetCtxs", "dex": dex},
-                    timeout=10
-                )
-                if resp.status_code != 200:
-                    continue
-                dex_meta = resp.json()
-                dex_universe = dex_meta[0]['universe']
-                dex_ctxs = dex_meta[1]
-
-                for i, asset in enumerate(dex_universe):
-                    coin = asset.get('name', '')
-                    if not coin:
-                        continue
-                    ctx = dex_ctxs[i]
-                    funding = float(ctx.get('funding', 0))
-                    price = float(ctx.get('markPx', 0))
-                    h3_oi = float(ctx.get('openInterest', 0))
-                    h3_volume = float(ctx.get('dayNtlVlm', 0))
-                    h3_prev_px = float(ctx.get('prevDayPx', 0))
-                    h3_pct_change = ((price - h3_prev_px) / h3_prev_px * 100) if h3_prev_px else 0.0
-                    funding_hr = funding * 100
-                    funding_apr = funding * 24 * 365 * 100
-
-                    hip3_data.append({
-                        'name': coin,
-                        'price': price,
-                        'funding_hr': funding_hr,
-                        'funding_apr': funding_apr,
-                        'oi': h3_oi,
-                        'oi_ntl': h3_oi * price,
-                        'volume': h3_volume,
-                        'pct_change': h3_pct_change,
-                    })
-            except Exception:
-                pass
+        # One metaAndAssetCtxs per dex, fetched concurrently; map keeps dex order
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for rows in pool.map(lambda d: _scan_hip3_dex(config['info_url'], d), dex_names):
+                hip3_data.extend(rows)
 
         # --sort mode: flat sorted table
         sort_key = getattr(args, 'sort', None)
@@ -2298,77 +2997,75 @@ def cmd_scan(args):
 
         # Default multi-section output
         # Sort by funding rate (most negative first)
-        assets_by_funding = sorted(assets, key=lambda x: x['funding_apr'])
+        funding_apr = operator.itemgetter('funding_apr')
+        assets_by_funding = sorted(assets, key=funding_apr)
 
-        print(f"\n{Colors.BOLD}{Colors.GREEN}TOP {top_n} NEGATIVE FUNDING (shorts paying longs - LONG opportunities):{Colors.END}")
-        print(f"{'Asset':<12} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9} {'Open Interest':>15} {'24h Volume':>15}")
-        print("-" * 89)
+        out = []
+        out.append(f"\n{Colors.BOLD}{Colors.GREEN}TOP {top_n} NEGATIVE FUNDING (shorts paying longs - LONG opportunities):{Colors.END}")
+        out.append(f"{'Asset':<12} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9} {'Open Interest':>15} {'24h Volume':>15}")
+        out.append("-" * 89)
 
         for a in assets_by_funding[:top_n]:
             funding_color = Colors.GREEN if a['funding_apr'] < -50 else Colors.YELLOW if a['funding_apr'] < 0 else Colors.END
             chg_color = Colors.GREEN if a['pct_change'] > 0 else Colors.RED if a['pct_change'] < 0 else Colors.END
-            print(f"{a['name']:<12} ${a['price']:>10,.2f} {funding_color}{a['funding_hr']:>11.4f}%{Colors.END} {a['funding_apr']:>9.1f}% {chg_color}{a['pct_change']:>+8.2f}%{Colors.END} ${a['oi']:>13,.0f} ${a['volume']:>13,.0f}")
+            out.append(_SCAN_FUNDING_ROW(fc=funding_color, cc=chg_color, **a))
 
-        print(f"\n{Colors.BOLD}{Colors.RED}TOP {top_n} POSITIVE FUNDING (longs paying shorts - SHORT opportunities or avoid):{Colors.END}")
-        print(f"{'Asset':<12} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9} {'Open Interest':>15} {'24h Volume':>15}")
-        print("-" * 89)
+        out.append(f"\n{Colors.BOLD}{Colors.RED}TOP {top_n} POSITIVE FUNDING (longs paying shorts - SHORT opportunities or avoid):{Colors.END}")
+        out.append(f"{'Asset':<12} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9} {'Open Interest':>15} {'24h Volume':>15}")
+        out.append("-" * 89)
 
         for a in assets_by_funding[-top_n:][::-1]:
             funding_color = Colors.RED if a['funding_apr'] > 50 else Colors.YELLOW if a['funding_apr'] > 0 else Colors.END
             chg_color = Colors.GREEN if a['pct_change'] > 0 else Colors.RED if a['pct_change'] < 0 else Colors.END
-            print(f"{a['name']:<12} ${a['price']:>10,.2f} {funding_color}{a['funding_hr']:>11.4f}%{Colors.END} {a['funding_apr']:>9.1f}% {chg_color}{a['pct_change']:>+8.2f}%{Colors.END} ${a['oi']:>13,.0f} ${a['volume']:>13,.0f}")
+            out.append(_SCAN_FUNDING_ROW(fc=funding_color, cc=chg_color, **a))
 
         # High volume movers
-        assets_by_volume = sorted(assets, key=lambda x: x['volume'], reverse=True)[:10]
-        print(f"\n{Colors.BOLD}{Colors.BLUE}TOP 10 BY VOLUME (most liquid):{Colors.END}")
-        print(f"{'Asset':<12} {'Price':>12} {'Funding APR':>12} {'24h Chg':>9} {'24h Volume':>15}")
-        print("-" * 64)
+        assets_by_volume = heapq.nlargest(10, assets, key=operator.itemgetter('volume'))
+        out.append(f"\n{Colors.BOLD}{Colors.BLUE}TOP 10 BY VOLUME (most liquid):{Colors.END}")
+        out.append(f"{'Asset':<12} {'Price':>12} {'Funding APR':>12} {'24h Chg':>9} {'24h Volume':>15}")
+        out.append("-" * 64)
         for a in assets_by_volume:
-            funding_color = Colors.GREEN if a['funding_apr'] < -10 else Colors.RED if a['funding_apr'] > 10 else Colors.YELLOW
+            funding_color = _FUND_COLORS[bisect.bisect_left(_FUND_EDGES, a['funding_apr'])]
             chg_color = Colors.GREEN if a['pct_change'] > 0 else Colors.RED if a['pct_change'] < 0 else Colors.END
-            print(f"{a['name']:<12} ${a['price']:>10,.2f} {funding_color}{a['funding_apr']:>11.1f}%{Colors.END} {chg_color}{a['pct_change']:>+8.2f}%{Colors.END} ${a['volume']:>13,.0f}")
+            out.append(_SCAN_VOLUME_ROW(fc=funding_color, cc=chg_color, **a))
 
         # HIP-3 section display
-        print(f"\n{Colors.BOLD}{Colors.MAGENTA}HIP-3 PERPS:{Colors.END}")
-        print(f"{'Asset':<14} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9}")
-        print("-" * 59)
+        out.append(f"\n{Colors.BOLD}{Colors.MAGENTA}HIP-3 PERPS:{Colors.END}")
+        out.append(f"{'Asset':<14} {'Price':>12} {'Funding/hr':>12} {'APR':>10} {'24h Chg':>9}")
+        out.append("-" * 59)
 
         for h in hip3_data:
-            funding_color = Colors.GREEN if h['funding_apr'] < -10 else Colors.RED if h['funding_apr'] > 10 else Colors.YELLOW
+            funding_color = _FUND_COLORS[bisect.bisect_left(_FUND_EDGES, h['funding_apr'])]
             chg_color = Colors.GREEN if h['pct_change'] > 0 else Colors.RED if h['pct_change'] < 0 else Colors.END
-            print(f"{h['name']:<14} ${h['price']:>10,.2f} {funding_color}{h['funding_hr']:>11.4f}%{Colors.END} {h['funding_apr']:>9.1f}% {chg_color}{h['pct_change']:>+8.2f}%{Colors.END}")
+            out.append(_SCAN_HIP3_ROW(fc=funding_color, cc=chg_color, **h))
+        _emit(out)
 
         print(f"\n{Colors.BOLD}Summary:{Colors.END}")
-        negative_funding = [a for a in assets if a['funding_apr'] < -20]
-        print(f"  Native perps with funding < -20% APR: {len(negative_funding)}")
-        if negative_funding:
-            best = min(negative_funding, key=lambda x: x['funding_apr'])
+        # Already sorted by APR: the < -20% rows are a prefix, led by the best one
+        negative_count = bisect.bisect_left(assets_by_funding, -20, key=funding_apr)
+        print(f"  Native perps with funding < -20% APR: {negative_count}")
+        if negative_count:
+            best = assets_by_funding[0]
             print(f"  Best native opportunity: {best['name']} at {best['funding_apr']:.1f}% APR (${best['volume']:,.0f} vol)")
 
         if hip3_data:
-            best_hip3 = min(hip3_data, key=lambda x: x['funding_apr'])
+            best_hip3 = min(hip3_data, key=funding_apr)
             print(f"  Best HIP-3 opportunity: {best_hip3['name']} at {best_hip3['funding_apr']:.1f}% APR")
 
     except Exception as e:
         print(f"{Colors.RED}Error scanning: {e}{Colors.END}")
-        import traceback
         traceback.print_exc()
 
 
 def cmd_hip3(args):
     """Get detailed data for HIP-3 perps (trade.xyz assets - equities, commodities, forex)."""
-    info, config = setup_info()
-    import requests as req
+    config = get_config(require_credentials=False)
 
     # If no specific asset, fetch all available from API
     if not args.coin:
         try:
             # Fetch all HIP-3 assets dynamically from xyz dex
-            meta = info.meta(dex='xyz')
-            universe = meta.get('universe', [])
-            assets = [a.get('name', '') for a in universe]
-            # Filter out empty and sort
-            assets = sorted([a for a in assets if a])
+            assets = get_hip3_universe(config['info_url'], 'xyz')
         except Exception as e:
             print(f"{Colors.YELLOW}Warning: Could not fetch HIP-3 assets dynamically, using fallback list{Colors.END}")
             assets = [
@@ -2381,22 +3078,29 @@ def cmd_hip3(args):
         coin = args.coin if args.coin.startswith('xyz:') else f'xyz:{args.coin}'
         assets = [coin]
 
+    info_url = config['info_url']
+
+    def fetch(coin):
+        # L2 book (price + liquidity) and latest funding rate
+        try:
+            return get_l2_book(info_url, coin), get_latest_funding(info_url, coin), None
+        except Exception as e:
+            return None, None, e
+
+    # Fetch every asset up front, then render in order
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        snapshots = list(pool.map(fetch, assets))
+
     print(f"\n{Colors.BOLD}{Colors.MAGENTA}HIP-3 EQUITY PERPS DATA{Colors.END}")
     print("=" * 80)
 
-    for coin in assets:
+    for coin, (book, funding, error) in zip(assets, snapshots):
         try:
             print(f"\n{Colors.BOLD}{coin}{Colors.END}")
+            if error:
+                raise error
 
-            # Get L2 Book (price + liquidity)
-            book_resp = req.post(
-                config['api_url'] + "/info",
-                json={"type": "l2Book", "coin": coin},
-                timeout=10
-            )
-
-            if book_resp.status_code == 200:
-                book = book_resp.json()
+            if book:
                 levels = book.get('levels', [])
 
                 if len(levels) >= 2 and levels[0] and levels[1]:
@@ -2407,8 +3111,8 @@ def cmd_hip3(args):
                     spread_bps = (spread / mid) * 10000
 
                     # Calculate depth
-                    bid_depth = sum(float(b['sz']) * float(b['px']) for b in levels[0][:5])
-                    ask_depth = sum(float(a['sz']) * float(a['px']) for a in levels[1][:5])
+                    bid_depth = _notional_depth(levels[0])
+                    ask_depth = _notional_depth(levels[1])
 
                     print(f"  Price:       ${mid:,.2f}")
                     print(f"  Bid:         ${best_bid:,.2f}")
@@ -2417,38 +3121,62 @@ def cmd_hip3(args):
                     print(f"  Bid Depth:   ${bid_depth:,.0f} (top 5 levels)")
                     print(f"  Ask Depth:   ${ask_depth:,.0f} (top 5 levels)")
 
-            # Get Funding Rate
-            funding_resp = req.post(
-                config['api_url'] + "/info",
-                json={"type": "fundingHistory", "coin": coin, "startTime": 0},
-                timeout=10
-            )
-
-            if funding_resp.status_code == 200:
-                data = funding_resp.json()
-                if data:
-                    latest = data[-1]
-                    funding = float(latest.get('fundingRate', 0))
-                    funding_hr = funding * 100
-                    funding_apr = funding * 24 * 365 * 100
-
-                    funding_color = Colors.GREEN if funding < 0 else Colors.RED if funding > 0.0001 else Colors.YELLOW
-                    signal = "shorts paying longs" if funding < 0 else "longs paying shorts" if funding > 0 else "neutral"
-
-                    print(f"  Funding:     {funding_color}{funding_hr:.4f}%/hr ({funding_apr:.1f}% APR){Colors.END}")
-                    print(f"  Signal:      {signal}")
-
-            # Get Meta info (if available)
-            meta_resp = req.post(
-                config['api_url'] + "/info",
-                json={"type": "perpsAtTime", "req": {"user": config['account_address'], "time": 0}},
-                timeout=10
-            )
+            if funding is not None:
+                funding_hr = funding * 100
+                funding_apr = funding * _APR_SCALE
+
+                funding_color = Colors.GREEN if funding < 0 else Colors.RED if funding > 0.0001 else Colors.YELLOW
+                signal = "shorts paying longs" if funding < 0 else "longs paying shorts" if funding > 0 else "neutral"
+
+                print(f"  Funding:     {funding_color}{funding_hr:.4f}%/hr ({funding_apr:.1f}% APR){Colors.END}")
+                print(f"  Signal:      {signal}")
 
         except Exception as e:
             print(f"  {Colors.RED}Error: {e}{Colors.END}")
 
 
+_GROK_URL = "https://api.x.ai/v1/responses"
+# Output cap for commands that only show the first ~1k chars of the answer.
+# Generous, since reasoning tokens count against it too.
+_GROK_SUMMARY_TOKENS = 2048
+
+
+def _grok_post(api_key: str, prompt: str, tool_type: str, timeout: int = 30,
+               max_output_tokens: Optional[int] = None):
+    """POST a single-tool Grok search prompt to the responses API."""
+    body = {
+        "model": "grok-4-1-fast",
+        "tools": [{"type": tool_type}],
+        "input": [{"role": "user", "content": prompt}]
+    }
+    if max_output_tokens:
+        body["max_output_tokens"] = max_output_tokens
+    return _http_session().post(
+        _GROK_URL,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json=body,
+        timeout=timeout
+    )
+
+
+def _print_grok_text(response, limit: Optional[int] = None, error_label: str = "Search error") -> bool:
+    """Print the message text of a Grok response (truncated to limit), or its HTTP error."""
+    if response.status_code != 200:
+        print(f"{Colors.RED}{error_label}: {response.status_code}{Colors.END}")
+        return False
+    data = _json_loads(response.content)
+    for item in data.get('output', []):
+        if item.get('type') == 'message':
+            for content in item.get('content', []):
+                if content.get('type') in ('text', 'output_text'):
+                    text = content.get('text', '')[:limit]
+                    print(f"{Colors.DIM}{text}{Colors.END}")
+    return True
+
+
 def cmd_sentiment(args):
     """Get sentiment analysis for an asset using Grok API."""
     coin = args.coin
@@ -2463,65 +3191,23 @@ def cmd_sentiment(args):
     print("=" * 60)
 
     try:
-        import requests as req
-
-        # Web search
-        print(f"\n{Colors.BOLD}Web Search (News & Analysis):{Colors.END}")
         web_query = f"What is the current market sentiment and recent news for {coin} cryptocurrency? Focus on price action, major developments, and whether traders are bullish or bearish. Be concise."
-
-        response = req.post(
-            "https://api.x.ai/v1/responses",
-            headers={
-                "Authorization": f"Bearer {grok_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "grok-4-1-fast",
-                "tools": [{"type": "web_search"}],
-                "input": [{"role": "user", "content": web_query}]
-            },
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            for item in data.get('output', []):
-                if item.get('type') == 'message':
-                    for content in item.get('content', []):
-                        if content.get('type') in ('text', 'output_text'):
-                            text = content.get('text', '')[:800]
-                            print(f"{Colors.DIM}{text}{Colors.END}")
-        else:
-            print(f"{Colors.RED}Web search error: {response.status_code}{Colors.END}")
-
-        # X/Twitter search
-        print(f"\n{Colors.BOLD}X/Twitter Sentiment:{Colors.END}")
         x_query = f"What is the sentiment on X/Twitter about ${coin} in the last 24-48 hours? Are traders bullish or bearish? What are the key opinions? Be concise."
 
-        response = req.post(
-            "https://api.x.ai/v1/responses",
-            headers={
-                "Authorization": f"Bearer {grok_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "grok-4-1-fast",
-                "tools": [{"type": "x_search"}],
-                "input": [{"role": "user", "content": x_query}]
-            },
-            timeout=30
-        )
+        # Run both searches at once; print in order
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            web_future = pool.submit(_grok_post, grok_api_key, web_query, "web_search",
+                                     max_output_tokens=_GROK_SUMMARY_TOKENS)
+            x_future = pool.submit(_grok_post, grok_api_key, x_query, "x_search",
+                                   max_output_tokens=_GROK_SUMMARY_TOKENS)
 
-        if response.status_code == 200:
-            data = response.json()
-            for item in data.get('output', []):
-                if item.get('type') == 'message':
-                    for content in item.get('content', []):
-                        if content.get('type') in ('text', 'output_text'):
-                            text = content.get('text', '')[:800]
-                            print(f"{Colors.DIM}{text}{Colors.END}")
-        else:
-            print(f"{Colors.RED}X search error: {response.status_code}{Colors.END}")
+            # Web search
+            print(f"\n{Colors.BOLD}Web Search (News & Analysis):{Colors.END}")
+            _print_grok_text(web_future.result(), 800, "Web search error")
+
+            # X/Twitter search
+            print(f"\n{Colors.BOLD}X/Twitter Sentiment:{Colors.END}")
+            _print_grok_text(x_future.result(), 800, "X search error")
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -2542,42 +3228,18 @@ def cmd_search(args):
     print(f"\n{Colors.BOLD}{Colors.CYAN}SEARCH: \"{query}\"{Colors.END}")
     print("=" * 60)
 
-    try:
-        import requests as req
-
-        def _grok_search(prompt, tool_type):
-            response = req.post(
-                "https://api.x.ai/v1/responses",
-                headers={
-                    "Authorization": f"Bearer {grok_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "grok-4-1-fast",
-                    "tools": [{"type": tool_type}],
-                    "input": [{"role": "user", "content": prompt}]
-                },
-                timeout=30
-            )
-            if response.status_code == 200:
-                data = response.json()
-                for item in data.get('output', []):
-                    if item.get('type') == 'message':
-                        for content in item.get('content', []):
-                            if content.get('type') in ('text', 'output_text'):
-                                print(f"{Colors.DIM}{content.get('text', '')}{Colors.END}")
-                return True
-            else:
-                print(f"{Colors.RED}Error: {response.status_code}{Colors.END}")
-                return False
-
-        if not x_only:
-            print(f"\n{Colors.BOLD}Web:{Colors.END}")
-            _grok_search(query, "web_search")
+    sections = []
+    if not x_only:
+        sections.append(("Web", "web_search"))
+    if not web_only:
+        sections.append(("X/Twitter", "x_search"))
 
-        if not web_only:
-            print(f"\n{Colors.BOLD}X/Twitter:{Colors.END}")
-            _grok_search(query, "x_search")
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(_grok_post, grok_api_key, query, tool) for _, tool in sections]
+            for (label, _), future in zip(sections, futures):
+                print(f"\n{Colors.BOLD}{label}:{Colors.END}")
+                _print_grok_text(future.result(), error_label="Error")
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -2585,8 +3247,6 @@ def cmd_search(args):
 
 def cmd_unlocks(args):
     """Check token unlock schedules using Grok search."""
-    import requests as req
-
     grok_api_key = os.getenv('XAI_API_KEY')
     if not grok_api_key:
         print(f"{Colors.RED}Error: XAI_API_KEY not set in .env{Colors.END}")
@@ -2618,48 +3278,27 @@ def cmd_unlocks(args):
     print(f"\n{Colors.BOLD}{Colors.CYAN}TOKEN UNLOCK CHECK{Colors.END}")
     print("=" * 70)
 
-    for coin in coins:
-        print(f"\n{Colors.BOLD}{coin}:{Colors.END}")
+    def search(coin):
+        query = f"What are the upcoming token unlocks or vesting events for {coin} cryptocurrency in the next 30 days? Include dates, amounts, and percentage of supply if available. Be specific and concise. If no unlocks found, say so."
+        return _grok_post(grok_api_key, query, "web_search", max_output_tokens=_GROK_SUMMARY_TOKENS)
 
-        try:
-            # Search for unlock info
-            query = f"What are the upcoming token unlocks or vesting events for {coin} cryptocurrency in the next 30 days? Include dates, amounts, and percentage of supply if available. Be specific and concise. If no unlocks found, say so."
-
-            response = req.post(
-                "https://api.x.ai/v1/responses",
-                headers={
-                    "Authorization": f"Bearer {grok_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "grok-4-1-fast",
-                    "tools": [{"type": "web_search"}],
-                    "input": [{"role": "user", "content": query}]
-                },
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                for item in data.get('output', []):
-                    if item.get('type') == 'message':
-                        for content in item.get('content', []):
-                            if content.get('type') in ('text', 'output_text'):
-                                text = content.get('text', '')[:600]
-                                print(f"{Colors.DIM}{text}{Colors.END}")
-            else:
-                print(f"{Colors.RED}Search error: {response.status_code}{Colors.END}")
+    # Query every coin concurrently (a few in flight), print in order
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(search, coin) for coin in coins]
 
-        except Exception as e:
-            print(f"{Colors.RED}Error: {e}{Colors.END}")
+        for coin, future in zip(coins, futures):
+            print(f"\n{Colors.BOLD}{coin}:{Colors.END}")
+
+            try:
+                _print_grok_text(future.result(), 600)
+            except Exception as e:
+                print(f"{Colors.RED}Error: {e}{Colors.END}")
 
     print()
 
 
 def cmd_devcheck(args):
     """Check for developer sentiment, complaints, and exodus signals."""
-    import requests as req
-
     coin = args.coin
 
     grok_api_key = os.getenv('XAI_API_KEY')
@@ -2671,68 +3310,28 @@ def cmd_devcheck(args):
     print("=" * 70)
 
     try:
-        # Search for developer issues/complaints
-        print(f"\n{Colors.BOLD}Developer Sentiment & Issues:{Colors.END}")
         dev_query = f"""Search for developer complaints, issues, or concerns about {coin} blockchain/protocol:
 1. Are developers leaving or switching to other chains?
 2. Any complaints about costs, centralization, or technical issues?
 3. Any apps or projects that abandoned {coin} for competitors?
 4. What are devs saying in forums, Discord, or X?
 Be specific with examples and sources."""
-
-        response = req.post(
-            "https://api.x.ai/v1/responses",
-            headers={
-                "Authorization": f"Bearer {grok_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "grok-4-1-fast",
-                "tools": [{"type": "web_search"}],
-                "input": [{"role": "user", "content": dev_query}]
-            },
-            timeout=45
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            for item in data.get('output', []):
-                if item.get('type') == 'message':
-                    for content in item.get('content', []):
-                        if content.get('type') in ('text', 'output_text'):
-                            text = content.get('text', '')[:1200]
-                            print(f"{Colors.DIM}{text}{Colors.END}")
-        else:
-            print(f"{Colors.RED}Search error: {response.status_code}{Colors.END}")
-
-        # X/Twitter dev sentiment
-        print(f"\n{Colors.BOLD}X/Twitter Dev Chatter:{Colors.END}")
         x_query = f"What are developers saying about {coin} on X/Twitter? Look for: complaints, frustrations, projects leaving, technical issues, cost concerns. Not price speculation - developer experience only."
 
-        response = req.post(
-            "https://api.x.ai/v1/responses",
-            headers={
-                "Authorization": f"Bearer {grok_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "grok-4-1-fast",
-                "tools": [{"type": "x_search"}],
-                "input": [{"role": "user", "content": x_query}]
-            },
-            timeout=30
-        )
+        # Run both searches at once; print in order
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            dev_future = pool.submit(_grok_post, grok_api_key, dev_query, "web_search", 45,
+                                     _GROK_SUMMARY_TOKENS)
+            x_future = pool.submit(_grok_post, grok_api_key, x_query, "x_search",
+                                   max_output_tokens=_GROK_SUMMARY_TOKENS)
 
-        if response.status_code == 200:
-            data = response.json()
-            for item in data.get('output', []):
-                if item.get('type') == 'message':
-                    for content in item.get('content', []):
-                        if content.get('type') in ('text', 'output_text'):
-                            text = content.get('text', '')[:800]
-                            print(f"{Colors.DIM}{text}{Colors.END}")
-        else:
-            print(f"{Colors.RED}X search error: {response.status_code}{Colors.END}")
+            # Search for developer issues/complaints
+            print(f"\n{Colors.BOLD}Developer Sentiment & Issues:{Colors.END}")
+            _print_grok_text(dev_future.result(), 1200)
+
+            # X/Twitter dev sentiment
+            print(f"\n{Colors.BOLD}X/Twitter Dev Chatter:{Colors.END}")
+            _print_grok_text(x_future.result(), 800, "X search error")
 
     except Exception as e:
         print(f"{Colors.RED}Error: {e}{Colors.END}")
@@ -2740,11 +3339,25 @@ Be specific with examples and sources."""
     print()
 
 
+_PM_TTL = 60
+
+
+def _pm_get(url: str):
+    """GET and decode a Polymarket gamma-api URL (cached by URL for _PM_TTL seconds)."""
+    def fetch():
+        r = _http_session().get(url, timeout=15)
+        r.raise_for_status()
+        return _json_loads(r.content)
+    return _ttl_cached(('polymarket', url), fetch, _PM_TTL)
+
+
+def _pm_volume(item: dict) -> float:
+    """Sort key for Polymarket events/markets (volume may be missing or null)."""
+    return float(item.get('volume', 0) or 0)
+
+
 def cmd_polymarket(args):
     """Get Polymarket prediction market data for trading signals."""
-    import httpx
-    import json
-
     category = args.category.lower() if args.category else 'crypto'
 
     # Map categories to API tags and client-side filters
@@ -2772,12 +3385,12 @@ def cmd_polymarket(args):
         if tag:
             url += f'&tag={tag}'
 
-        r = httpx.get(url, timeout=15)
-        if r.status_code != 200:
-            print(f"{Colors.RED}API error: {r.status_code}{Colors.END}")
+        try:
+            events = _pm_get(url)
+        except requests.HTTPError as e:
+            print(f"{Colors.RED}API error: {e.response.status_code}{Colors.END}")
             return
 
-        events = r.json()
         if not events:
             print(f"{Colors.DIM}No active events found for '{category}'.{Colors.END}")
             return
@@ -2786,40 +3399,34 @@ def cmd_polymarket(args):
         if title_filter:
             events = [e for e in events if title_filter(e.get('title', ''))]
 
-        # Sort by volume descending
-        events.sort(key=lambda x: float(x.get('volume', 0) or 0), reverse=True)
+        # Top 10 by volume
+        events = heapq.nlargest(10, events, key=_pm_volume)
 
         if not events:
             print(f"{Colors.DIM}No matching events found for '{category}'.{Colors.END}")
             return
 
-        for event in events[:10]:
+        for event in events:
             title = event.get('title', 'Unknown')
-            volume = float(event.get('volume', 0) or 0)
+            volume = _pm_volume(event)
 
             print(f"\n{Colors.BOLD}{title}{Colors.END}")
             print(f"  Volume: ${volume:,.0f}")
 
-            markets = event.get('markets', [])
-            markets.sort(key=lambda x: float(x.get('volume', 0) or 0), reverse=True)
+            markets = heapq.nlargest(8, event.get('markets', []), key=_pm_volume)
 
-            for m in markets[:8]:
+            for m in markets:
                 question = m.get('question', '')
                 prices = m.get('outcomePrices', '[]')
                 try:
-                    p = json.loads(prices) if isinstance(prices, str) else prices
+                    p = _json_loads(prices) if isinstance(prices, str) else prices
                     yes_prob = float(p[0]) * 100 if p and len(p) > 0 else 0
                 except:
                     yes_prob = 0
-                vol = float(m.get('volume', 0) or 0)
+                vol = _pm_volume(m)
 
                 # Color code by probability
-                if yes_prob > 70:
-                    prob_color = Colors.GREEN
-                elif yes_prob < 30:
-                    prob_color = Colors.RED
-                else:
-                    prob_color = Colors.YELLOW
+                prob_color = _PROB_COLORS[bisect.bisect_right(_PROB_EDGES, yes_prob)]
 
                 print(f"    {question}: {prob_color}{yes_prob:5.1f}%{Colors.END} (${vol:,.0f})")
 
@@ -2879,8 +3486,6 @@ def cmd_dexes(args):
 
 def cmd_history(args):
     """Show trade history from Hyperliquid API."""
-    from datetime import datetime
-
     info, config = setup_info(require_credentials=True)
 
     print(f"\n{Colors.BOLD}{Colors.CYAN}TRADE HISTORY{Colors.END}")
@@ -2893,24 +3498,24 @@ def cmd_history(args):
             print("No trades found.")
             return
 
-        # Limit results
+        # Limit results, most recent first
         limit = args.limit if hasattr(args, 'limit') and args.limit else 20
-        recent = fills[-limit:]
+        recent = list(islice(reversed(fills), limit))
 
         print(f"{'Time':<18} {'Side':<6} {'Asset':<14} {'Size':>12} {'Price':>14} {'Value':>12}")
         print("-" * 80)
 
-        for fill in reversed(recent):  # Most recent first
-            ts = fill.get('time', 0)
-            dt = datetime.fromtimestamp(ts/1000).strftime('%Y-%m-%d %H:%M')
+        fromtimestamp = datetime.fromtimestamp
+        for fill in recent:
+            dt = fromtimestamp(fill.get('time', 0) * 1e-3).strftime('%Y-%m-%d %H:%M')
             coin = fill.get('coin', '?')
             side = fill.get('side', '?')
-            side_str = f"{Colors.GREEN}BUY{Colors.END}" if side == 'B' else f"{Colors.RED}SELL{Colors.END}"
+            side_col = _BUY_COL if side == 'B' else _SELL_COL
             sz = float(fill.get('sz', 0))
             px = float(fill.get('px', 0))
             value = sz * px
 
-            print(f"{dt:<18} {side_str:<15} {coin:<14} {sz:>12.4f} ${px:>13.4f} ${value:>11.2f}")
+            print(_HISTORY_ROW(dt, side_col, coin, sz, px, value))
 
         print(f"\n{Colors.DIM}Showing last {len(recent)} trades. Use --limit N for more.{Colors.END}")
 
@@ -2922,118 +3527,205 @@ def cmd_history(args):
 # MAIN
 # ============================================================================
 
-def main():
+# Handlers that never resolve coins through the SDK's HIP-3 name mappings
+# (they post to /info directly or only touch native/spot assets). They skip
+# the dex metadata fetch unless a dex-prefixed coin such as xyz:TSLA is given.
+for _handler in (cmd_price, cmd_funding, cmd_book, cmd_candles, cmd_funding_history,
+                 cmd_trades, cmd_user_funding, cmd_portfolio, cmd_leverage, cmd_transfer,
+                 cmd_buy, cmd_sell, cmd_limit_buy, cmd_limit_sell, cmd_stop_loss,
+                 cmd_take_profit, cmd_close, cmd_replace, cmd_analyze, cmd_raw, cmd_scan, cmd_sentiment,
+                 cmd_search, cmd_hip3, cmd_polymarket, cmd_history, cmd_unlocks, cmd_devcheck):
+    _handler.needs_hip3 = False
+
+
+def _wants_hip3(handler, args) -> bool:
+    """Whether this invocation needs HIP-3 dex metadata loaded into the SDK."""
+    # Dex-prefixed coins resolve through the HIP-3 mappings, so they always win
+    coins = getattr(args, 'coins', None) or [getattr(args, 'coin', None) or '']
+    if any(':' in c for c in coins):
+        return True
+    if args.no_hip3 or os.getenv('HL_SKIP_HIP3', '').lower() in ('1', 'true'):
+        return False
+    return getattr(handler, 'needs_hip3', True)
+
+
+class _SkippedParser:
+    """Stand-in for subcommands that _build_parser doesn't need to construct."""
+
+    def add_argument(self, *args, **kwargs):
+        pass
+
+    set_defaults = add_argument
+
+
+def _build_parser(only: Optional[str] = None) -> tuple:
+    """Build the CLI parser and return (parser, subparsers action).
+
+    With only set, just that subcommand gets a real parser; the rest are
+    skipped, which saves building ~35 unused argparse parsers per run.
+    """
     parser = argparse.ArgumentParser(
         description='Hyperliquid Trading Toolkit',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
+    parser.add_argument('--no-hip3', action='store_true',
+                        help='Skip loading HIP-3 dex metadata (also HL_SKIP_HIP3=1). '
+                             'Ignored when a dex-prefixed coin like xyz:TSLA is given.')
 
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
+    def add_parser(name, **kwargs):
+        if only is not None and name != only:
+            return _SkippedParser()
+        return subparsers.add_parser(name, **kwargs)
+
     # Status commands
-    subparsers.add_parser('status', help='Account status and positions summary')
-    check_parser = subparsers.add_parser('check', help='Position health check (book ratio, funding, warnings)')
+    add_parser('status', help='Account status and positions summary').set_defaults(func=cmd_status)
+    check_parser = add_parser('check', help='Position health check (book ratio, funding, warnings)')
+    check_parser.set_defaults(func=cmd_check)
     check_parser.add_argument('--address', help='Account address (overrides HL_ACCOUNT_ADDRESS)')
-    subparsers.add_parser('positions', help='Detailed position information')
-    subparsers.add_parser('orders', help='List open orders')
+    check_parser.add_argument('--fast', action='store_true',
+                              help='Use mark prices from the funding snapshot and skip order book depth')
+    add_parser('positions', help='Detailed position information').set_defaults(func=cmd_positions)
+    add_parser('orders', help='List open orders').set_defaults(func=cmd_orders)
 
     # Price/data commands
-    price_parser = subparsers.add_parser('price', help='Get current prices')
+    price_parser = add_parser('price', help='Get current prices')
+    price_parser.set_defaults(func=cmd_price)
     price_parser.add_argument('coins', nargs='*', help='Assets to get prices for')
 
-    funding_parser = subparsers.add_parser('funding', help='Get funding rates')
+    funding_parser = add_parser('funding', help='Get funding rates')
+    funding_parser.set_defaults(func=cmd_funding)
     funding_parser.add_argument('coins', nargs='*', help='Assets to get funding for')
     funding_parser.add_argument('--predicted', action='store_true', help='Show predicted rates with cross-exchange comparison')
 
-    book_parser = subparsers.add_parser('book', help='Get order book')
+    book_parser = add_parser('book', help='Get order book')
+    book_parser.set_defaults(func=cmd_book)
     book_parser.add_argument('coin', help='Asset to get order book for')
 
-    candles_parser = subparsers.add_parser('candles', help='Get OHLCV candlestick data')
+    candles_parser = add_parser('candles', help='Get OHLCV candlestick data')
+    candles_parser.set_defaults(func=cmd_candles)
     candles_parser.add_argument('coin', help='Asset to get candles for')
     candles_parser.add_argument('--interval', default='1h', help='Candle interval: 1m, 5m, 15m, 1h, 4h, 1d (default: 1h)')
     candles_parser.add_argument('--lookback', default='7d', help='Lookback period: e.g., 24h, 7d, 2w (default: 7d)')
 
-    fh_parser = subparsers.add_parser('funding-history', help='Historical funding rates for a coin')
+    fh_parser = add_parser('funding-history', help='Historical funding rates for a coin')
+    fh_parser.set_defaults(func=cmd_funding_history)
     fh_parser.add_argument('coin', help='Asset to get funding history for')
     fh_parser.add_argument('--lookback', default='7d', help='Lookback period: e.g., 24h, 7d, 2w (default: 7d)')
 
-    trades_parser = subparsers.add_parser('trades', help='Recent trades for a coin')
+    trades_parser = add_parser('trades', help='Recent trades for a coin')
+    trades_parser.set_defaults(func=cmd_trades)
     trades_parser.add_argument('coin', help='Asset to get recent trades for')
     trades_parser.add_argument('--limit', type=int, default=20, help='Number of trades to show (default: 20)')
 
-    uf_parser = subparsers.add_parser('user-funding', help='Your funding payments received/paid')
+    uf_parser = add_parser('user-funding', help='Your funding payments received/paid')
+    uf_parser.set_defaults(func=cmd_user_funding)
     uf_parser.add_argument('--lookback', default='7d', help='Lookback period: e.g., 24h, 7d, 2w (default: 7d)')
 
-    portfolio_parser = subparsers.add_parser('portfolio', help='Portfolio performance overview')
+    portfolio_parser = add_parser('portfolio', help='Portfolio performance overview')
+    portfolio_parser.set_defaults(func=cmd_portfolio)
     portfolio_parser.add_argument('--address', help='Account address (overrides HL_ACCOUNT_ADDRESS)')
 
     # Trading commands
-    leverage_parser = subparsers.add_parser('leverage', help='Set leverage for an asset')
+    leverage_parser = add_parser('leverage', help='Set leverage for an asset')
+    leverage_parser.set_defaults(func=cmd_leverage)
     leverage_parser.add_argument('coin', help='Asset to set leverage for')
     leverage_parser.add_argument('leverage', type=int, help='Leverage multiplier (e.g., 5 for 5x)')
     leverage_parser.add_argument('--isolated', action='store_true', help='Use isolated margin (default: cross)')
 
-    swap_parser = subparsers.add_parser('swap', help='Swap USDC to HIP-3 dex collateral (USDH, USDe, USDT0, USDXL)')
+    swap_parser = add_parser('swap', help='Swap USDC to HIP-3 dex collateral (USDH, USDe, USDT0, USDXL)')
+    swap_parser.set_defaults(func=cmd_transfer)
     swap_parser.add_argument('amount', type=float, help='Amount to swap')
     swap_parser.add_argument('--token', default=None, help='Collateral token (default: USDH). Options: USDH, USDe, USDT0, USDXL')
     swap_parser.add_argument('--to-usdc', action='store_true', help='Reverse: sell collateral back to USDC')
+    swap_parser.add_argument('--verify', action='store_true', help='Re-read balances from the API after the swap')
 
-    buy_parser = subparsers.add_parser('buy', help='Market buy')
+    buy_parser = add_parser('buy', help='Market buy')
+    buy_parser.set_defaults(func=cmd_buy)
     buy_parser.add_argument('coin', help='Asset to buy')
     buy_parser.add_argument('size', type=float, help='Size to buy')
     buy_parser.add_argument('--leverage', type=int, help='Set leverage before order (e.g., 5 for 5x)')
     buy_parser.add_argument('--isolated', action='store_true', help='Use isolated margin (default: cross)')
 
-    sell_parser = subparsers.add_parser('sell', help='Market sell')
+    sell_parser = add_parser('sell', help='Market sell')
+    sell_parser.set_defaults(func=cmd_sell)
     sell_parser.add_argument('coin', help='Asset to sell')
     sell_parser.add_argument('size', type=float, help='Size to sell')
     sell_parser.add_argument('--leverage', type=int, help='Set leverage before order (e.g., 5 for 5x)')
     sell_parser.add_argument('--isolated', action='store_true', help='Use isolated margin (default: cross)')
 
-    limit_buy_parser = subparsers.add_parser('limit-buy', help='Limit buy order')
+    limit_buy_parser = add_parser('limit-buy', help='Limit buy order')
+    limit_buy_parser.set_defaults(func=cmd_limit_buy)
     limit_buy_parser.add_argument('coin', help='Asset to buy')
     limit_buy_parser.add_argument('size', type=float, help='Size to buy')
     limit_buy_parser.add_argument('price', type=float, help='Limit price')
 
-    limit_sell_parser = subparsers.add_parser('limit-sell', help='Limit sell order')
+    limit_sell_parser = add_parser('limit-sell', help='Limit sell order')
+    limit_sell_parser.set_defaults(func=cmd_limit_sell)
     limit_sell_parser.add_argument('coin', help='Asset to sell')
     limit_sell_parser.add_argument('size', type=float, help='Size to sell')
     limit_sell_parser.add_argument('price', type=float, help='Limit price')
 
-    sl_parser = subparsers.add_parser('stop-loss', help='Place stop-loss trigger order')
+    sl_parser = add_parser('stop-loss', help='Place stop-loss trigger order')
+    sl_parser.set_defaults(func=cmd_stop_loss)
     sl_parser.add_argument('coin', help='Asset')
     sl_parser.add_argument('size', type=float, help='Size to close')
     sl_parser.add_argument('trigger_price', type=float, help='Trigger price (market order fires when hit)')
     sl_parser.add_argument('--buy', action='store_true', help='Force buy side (for closing shorts)')
 
-    tp_parser = subparsers.add_parser('take-profit', help='Place take-profit trigger order')
+    tp_parser = add_parser('take-profit', help='Place take-profit trigger order')
+    tp_parser.set_defaults(func=cmd_take_profit)
     tp_parser.add_argument('coin', help='Asset')
     tp_parser.add_argument('size', type=float, help='Size to close')
     tp_parser.add_argument('trigger_price', type=float, help='Trigger price (market order fires when hit)')
     tp_parser.add_argument('--buy', action='store_true', help='Force buy side (for closing shorts)')
 
-    close_parser = subparsers.add_parser('close', help='Close position')
+    bracket_parser = add_parser('bracket', help='Market entry with stop-loss and take-profit in one batch')
+    bracket_parser.set_defaults(func=cmd_bracket)
+    bracket_parser.add_argument('coin', help='Asset')
+    bracket_parser.add_argument('side', choices=['buy', 'sell'], help='Entry side (buy = long, sell = short)')
+    bracket_parser.add_argument('size', type=float, help='Position size')
+    bracket_parser.add_argument('--sl', type=float, required=True, help='Stop-loss trigger price')
+    bracket_parser.add_argument('--tp', type=float, required=True, help='Take-profit trigger price')
+    bracket_parser.add_argument('--leverage', type=int, help='Set leverage before order (e.g., 5 for 5x)')
+    bracket_parser.add_argument('--isolated', action='store_true', help='Use isolated margin (default: cross)')
+
+    close_parser = add_parser('close', help='Close position')
+    close_parser.set_defaults(func=cmd_close)
     close_parser.add_argument('coin', help='Asset to close')
 
-    cancel_parser = subparsers.add_parser('cancel', help='Cancel order')
+    cancel_parser = add_parser('cancel', help='Cancel order')
+    cancel_parser.set_defaults(func=cmd_cancel)
     cancel_parser.add_argument('oid', help='Order ID to cancel')
 
-    subparsers.add_parser('cancel-all', help='Cancel all open orders')
+    add_parser('cancel-all', help='Cancel all open orders').set_defaults(func=cmd_cancel_all)
 
-    modify_parser = subparsers.add_parser('modify-order', help='Modify existing order price/size')
+    modify_parser = add_parser('modify-order', help='Modify existing order price/size')
+    modify_parser.set_defaults(func=cmd_modify_order)
     modify_parser.add_argument('oid', help='Order ID to modify')
     modify_parser.add_argument('price', type=float, help='New price')
     modify_parser.add_argument('--size', type=float, help='New size (default: keep current)')
 
+    replace_parser = add_parser('replace', help='Cancel resting limits on a coin and place new ones in one batch')
+    replace_parser.set_defaults(func=cmd_replace)
+    replace_parser.add_argument('coin', help='Asset')
+    replace_parser.add_argument('side', choices=['buy', 'sell'], help='Side of the new orders')
+    replace_parser.add_argument('size', type=float, help='Size per order')
+    replace_parser.add_argument('prices', type=float, nargs='+', help='Limit price(s), one order each')
+
     # Analysis commands
-    analyze_parser = subparsers.add_parser('analyze', help='Comprehensive analysis with raw data')
+    analyze_parser = add_parser('analyze', help='Comprehensive analysis with raw data')
+    analyze_parser.set_defaults(func=cmd_analyze)
     analyze_parser.add_argument('coins', nargs='*', help='Assets to analyze (default: BTC ETH SOL DOGE HYPE)')
 
-    raw_parser = subparsers.add_parser('raw', help='Dump raw JSON data for an asset')
+    raw_parser = add_parser('raw', help='Dump raw JSON data for an asset')
+    raw_parser.set_defaults(func=cmd_raw)
     raw_parser.add_argument('coin', help='Asset to dump data for')
 
-    scan_parser = subparsers.add_parser('scan', help='Scan ALL assets for funding opportunities')
+    scan_parser = add_parser('scan', help='Scan ALL assets for funding opportunities')
+    scan_parser.set_defaults(func=cmd_scan)
     scan_parser.add_argument('--min-volume', type=float, default=100000, help='Minimum 24h volume filter (default: 100000)')
     scan_parser.add_argument('--top', type=int, default=20, help='Number of top results to show (default: 20)')
     scan_parser.add_argument('--sort', choices=['funding', 'volume', 'oi', 'price-change'],
@@ -3041,81 +3733,62 @@ def main():
     scan_parser.add_argument('--reverse', action='store_true',
                              help='Reverse sort direction')
 
-    sentiment_parser = subparsers.add_parser('sentiment', help='Get Grok sentiment analysis for an asset')
+    sentiment_parser = add_parser('sentiment', help='Get Grok sentiment analysis for an asset')
+    sentiment_parser.set_defaults(func=cmd_sentiment)
     sentiment_parser.add_argument('coin', help='Asset to analyze sentiment for')
 
-    search_parser = subparsers.add_parser('search', help='Search web and X/Twitter via Grok')
+    search_parser = add_parser('search', help='Search web and X/Twitter via Grok')
+    search_parser.set_defaults(func=cmd_search)
     search_parser.add_argument('query', help='Search query (any topic)')
     search_parser.add_argument('--web', action='store_true', help='Web search only')
     search_parser.add_argument('--x', action='store_true', help='X/Twitter search only')
 
-    hip3_parser = subparsers.add_parser('hip3', help='Get HIP-3 equity perp data (trade.xyz)')
+    hip3_parser = add_parser('hip3', help='Get HIP-3 equity perp data (trade.xyz)')
+    hip3_parser.set_defaults(func=cmd_hip3)
     hip3_parser.add_argument('coin', nargs='?', help='HIP-3 asset (e.g., META, TSLA) - leave empty for all')
 
-    polymarket_parser = subparsers.add_parser('polymarket', help='Get active Polymarket prediction markets')
+    polymarket_parser = add_parser('polymarket', help='Get active Polymarket prediction markets')
+    polymarket_parser.set_defaults(func=cmd_polymarket)
     polymarket_parser.add_argument('category', nargs='?', default='crypto',
                                    help='crypto | btc | eth | trending | macro (default: crypto)')
 
-    subparsers.add_parser('dexes', help='List all HIP-3 dexes and their assets')
+    add_parser('dexes', help='List all HIP-3 dexes and their assets').set_defaults(func=cmd_dexes)
 
-    history_parser = subparsers.add_parser('history', help='Show trade history from API')
+    history_parser = add_parser('history', help='Show trade history from API')
+    history_parser.set_defaults(func=cmd_history)
     history_parser.add_argument('--limit', type=int, default=20, help='Number of trades to show (default: 20)')
 
-    unlocks_parser = subparsers.add_parser('unlocks', help='Check token unlock schedules')
+    unlocks_parser = add_parser('unlocks', help='Check token unlock schedules')
+    unlocks_parser.set_defaults(func=cmd_unlocks)
     unlocks_parser.add_argument('coins', nargs='*', help='Tokens to check (default: current positions)')
 
-    devcheck_parser = subparsers.add_parser('devcheck', help='Check developer sentiment and exodus signals')
+    devcheck_parser = add_parser('devcheck', help='Check developer sentiment and exodus signals')
+    devcheck_parser.set_defaults(func=cmd_devcheck)
     devcheck_parser.add_argument('coin', help='Protocol to check developer sentiment for')
 
+    return parser, subparsers
+
+
+def main():
+    global _hip3_enabled
+
+    # Fast path: the first non-option argument names the subcommand, so build
+    # only that one. Anything else (--help, typos, no command) gets the full
+    # parser so help text and "invalid choice" errors list every command.
+    command = next((a for a in sys.argv[1:] if not a.startswith('-')), None)
+    parser, subparsers = _build_parser(command)
+    if command not in subparsers.choices:
+        parser, subparsers = _build_parser()
+
     args = parser.parse_args()
 
-    if not args.command:
+    if not hasattr(args, 'func'):
         parser.print_help()
         return
 
-    # Route to command handlers
-    commands = {
-        'status': cmd_status,
-        'check': cmd_check,
-        'positions': cmd_positions,
-        'orders': cmd_orders,
-        'price': cmd_price,
-        'funding': cmd_funding,
-        'book': cmd_book,
-        'candles': cmd_candles,
-        'funding-history': cmd_funding_history,
-        'trades': cmd_trades,
-        'user-funding': cmd_user_funding,
-        'portfolio': cmd_portfolio,
-        'leverage': cmd_leverage,
-        'swap': cmd_transfer,
-        'buy': cmd_buy,
-        'sell': cmd_sell,
-        'limit-buy': cmd_limit_buy,
-        'limit-sell': cmd_limit_sell,
-        'stop-loss': cmd_stop_loss,
-        'take-profit': cmd_take_profit,
-        'close': cmd_close,
-        'cancel': cmd_cancel,
-        'cancel-all': cmd_cancel_all,
-        'modify-order': cmd_modify_order,
-        'analyze': cmd_analyze,
-        'raw': cmd_raw,
-        'scan': cmd_scan,
-        'sentiment': cmd_sentiment,
-        'search': cmd_search,
-        'hip3': cmd_hip3,
-        'polymarket': cmd_polymarket,
-        'dexes': cmd_dexes,
-        'history': cmd_history,
-        'unlocks': cmd_unlocks,
-        'devcheck': cmd_devcheck,
-    }
-
-    if args.command in commands:
-        commands[args.command](args)
-    else:
-        parser.print_help()
+    _load_env()
+    _hip3_enabled = _wants_hip3(args.func, args)
+    args.func(args)
 
 
 if __name__ == '__main__':
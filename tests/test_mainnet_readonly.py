@@ -404,3 +404,13 @@ class TestCLI:
     def test_invalid_command(self):
         rc, out, err = run_cli("nonexistent-command")
         assert rc != 0
+
+    def test_replace_help(self):
+        rc, out, err = run_cli("replace", "--help")
+        assert rc == 0
+        assert "prices" in out
+
+    def test_bracket_help(self):
+        rc, out, err = run_cli("bracket", "--help")
+        assert rc == 0
+        assert "--sl" in out and "--tp" in out
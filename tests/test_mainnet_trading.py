@@ -93,8 +93,10 @@ def cleanup_positions():
     try:
         rc, out, _ = run_cli("positions", timeout=30)
         if rc == 0 and "No open positions" not in out:
-            # Extract asset names from position output
-            for coin in re.findall(r"^\x1b\[1m(\S+)\x1b\[0m", out, re.MULTILINE):
+            # Extract asset names from position output: each position is a
+            # coin header line directly followed by its "  Side:" line
+            # (output is piped, so there are no color codes)
+            for coin in re.findall(r"^([\w:@/.-]+)\n  Side: ", out, re.MULTILINE):
                 try:
                     run_cli("close", coin, timeout=30)
                     time.sleep(2)
@@ -236,6 +238,30 @@ class TestNativeTrading:
         if new_oid is not None:
             TestNativeTrading.oid = new_oid
 
+    def test_replace_orders(self):
+        """Replace the limit order with two new ones in one batch."""
+        assert TestNativeTrading.oid is not None, "No OID from limit-sell test"
+
+        rc, out, _ = run_cli("price", "SOL")
+        assert rc == 0
+        price_match = re.search(r"\$\s*([\d,]+(?:\.\d+)?)", out)
+        assert price_match, f"Could not parse SOL price from: {out}"
+        current_price = float(price_match.group(1).replace(",", ""))
+        px1 = round(current_price * 1.50, 2)  # 50% above market
+        px2 = round(current_price * 1.60, 2)  # 60% above market
+
+        rc, out, err = run_cli("replace", "SOL", "sell", "0.2", str(px1), str(px2))
+        assert rc == 0, f"failed: {err or out}"
+        assert f"Canceled order {TestNativeTrading.oid}" in out
+        new_oids = [int(oid) for oid in re.findall(r"Placed .*\(OID: (\d+)\)", out)]
+        assert len(new_oids) == 2, f"Expected two resting orders: {out}"
+
+        # Keep one for the cancel test, clean up the other here
+        TestNativeTrading.oid = new_oids[0]
+        rc, out, err = run_cli("cancel", str(new_oids[1]))
+        assert rc == 0, f"failed: {err or out}"
+        assert "Order canceled!" in out
+
     def test_cancel_order(self):
         """Cancel the limit order."""
         assert TestNativeTrading.oid is not None, "No OID from limit-sell test"
@@ -332,3 +358,46 @@ class TestTriggerOrders:
         rc, out, err = run_cli("close", "SOL")
         assert rc == 0, f"failed: {err or out}"
         assert "Position closed!" in out
+
+    def test_bracket_rejects_inverted_triggers(self):
+        """A long whose stop-loss sits above its take-profit is refused before sending."""
+        rc, out, _ = run_cli("price", "SOL")
+        assert rc == 0
+        price_match = re.search(r"\$\s*([\d,]+(?:\.\d+)?)", out)
+        assert price_match, f"Could not parse SOL price from: {out}"
+        current_price = float(price_match.group(1).replace(",", ""))
+
+        rc, out, err = run_cli("bracket", "SOL", "buy", "0.2",
+                               "--sl", str(round(current_price * 1.50, 2)),
+                               "--tp", str(round(current_price * 0.50, 2)))
+        assert rc == 0, f"failed: {err or out}"
+        assert "stop-loss must be below the take-profit" in out
+        assert "Entry filled" not in out
+
+    def test_bracket(self):
+        """Market entry with stop-loss and take-profit in one batch."""
+        rc, out, _ = run_cli("price", "SOL")
+        assert rc == 0
+        price_match = re.search(r"\$\s*([\d,]+(?:\.\d+)?)", out)
+        assert price_match, f"Could not parse SOL price from: {out}"
+        current_price = float(price_match.group(1).replace(",", ""))
+        sl_price = round(current_price * 0.50, 2)  # 50% below market
+        tp_price = round(current_price * 1.50, 2)  # 50% above market
+
+        rc, out, err = run_cli("bracket", "SOL", "buy", "0.2", "--sl", str(sl_price), "--tp", str(tp_price))
+        assert rc == 0, f"failed: {err or out}"
+        assert "Entry filled" in out
+        assert re.search(r"Stop-loss placed \(OID: \d+\)", out), f"No stop-loss OID in output: {out}"
+        assert re.search(r"Take-profit placed \(OID: \d+\)", out), f"No take-profit OID in output: {out}"
+
+    def test_cancel_all_after_bracket(self):
+        """Cancel the bracket's trigger orders."""
+        rc, out, err = run_cli("cancel-all")
+        assert rc == 0, f"failed: {err or out}"
+        assert "Done!" in out
+
+    def test_close_after_bracket(self):
+        """Close the bracket's SOL position."""
+        rc, out, err = run_cli("close", "SOL")
+        assert rc == 0, f"failed: {err or out}"
+        assert "Position closed!" in out